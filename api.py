@@ -1,11 +1,27 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app, Response, stream_with_context
 from models import db, Admin, EventManager, Participant, Event, Registration
-from auth import authenticate_user, login_user, logout_user, login_required, get_current_user
+from auth import authenticate_user, login_user, logout_user, login_required, get_current_user, invalidate_principal
+from passwords import hasher
+from reference_data import reference_data
+from seats import create_registration, record_status_change, apply_status_changes
+from pagination import keyset_paginate
+from dashboard_stats import participant_summary
+from instrumentation import instrumentation
+from imports import import_participants, spool_csv
+from exports import registration_records, ndjson_stream
+from conditional import make_etag, not_modified, set_validators
+import io
+import math
 from datetime import datetime
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Largest batch accepted by the bulk registration status endpoint
+MAX_BULK_STATUS_UPDATES = 1000
+# Largest page size accepted by the event listing API
+MAX_EVENTS_PER_PAGE = 100
+
 @api_bp.route('/login', methods=['POST'])
 def api_login():
     """API endpoint for user login"""
@@ -70,12 +86,12 @@ def api_profile():
 def api_events():
     """API endpoint to get events"""
     try:
-        from auth import get_current_user
         user = get_current_user()
         user_type = session.get('user_type')
         
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        per_page = min(per_page if per_page >= 1 else 20, MAX_EVENTS_PER_PAGE)
         status = request.args.get('status', None)
         
         query = Event.query
@@ -89,22 +105,60 @@ def api_events():
         if status:
             query = query.filter(Event.event_status_id == status)
         
-        events = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
-        
-        return jsonify({
+        # Conditional GET: validate against (event_id, updated_at) of the page's rows and the total,
+        # fetched without loading full events, and answer 304 before serializing anything. Lists get
+        # no Last-Modified: deleting or moving a row does not advance the newest updated_at on a page
+        scope = (user_type, user.event_manager_id if user_type == 'event_manager' else None)
+        args = sorted(request.args.items(multi=True))
+        
+        # Keyset mode: ordered by (event_date, event_id) and addressed by an opaque cursor
+        if 'cursor' in request.args:
+            keyset_args = dict(cursor=request.args.get('cursor'), per_page=per_page, total=request.args.get('total'),
+                               approx_table='event' if user_type != 'event_manager' and not status else None)
+            columns = [Event.event_date, Event.event_id]
+            light = keyset_paginate(query.with_entities(Event.event_id, Event.event_date, Event.updated_at), columns, **keyset_args)
+            etag = make_etag('events', scope, args, [(row.event_id, row.updated_at) for row in light.items], light.total)
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+            
+            # Same page with full rows; the count and next cursor come from the validator query
+            events = keyset_paginate(query, columns, keyset_args['cursor'], per_page)
+            response = jsonify({
+                'success': True,
+                'events': [event.to_dict() for event in events.items],
+                'pagination': {
+                    'per_page': light.per_page,
+                    'next_cursor': light.next_cursor,
+                    'total': light.total
+                }
+            })
+            return set_validators(response, etag), 200
+        
+        # Page arguments normalized as paginate() would, so the validator sees exactly the page's rows
+        page = max(page, 1)
+        query = query.order_by(Event.event_id)
+        light = query.with_entities(Event.event_id, Event.updated_at).limit(per_page).offset((page - 1) * per_page).all()
+        total = query.order_by(None).count()
+        etag = make_etag('events', scope, args, [(row.event_id, row.updated_at) for row in light], total)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        # Full rows for the same page; the total above is reused instead of counting again
+        events = query.limit(per_page).offset((page - 1) * per_page).all()
+        
+        response = jsonify({
             'success': True,
-            'events': [event.to_dict() for event in events.items],
+            'events': [event.to_dict() for event in events],
             'pagination': {
-                'page': events.page,
-                'pages': events.pages,
-                'per_page': events.per_page,
-                'total': events.total
+                'page': page,
+                'pages': math.ceil(total / per_page),
+                'per_page': per_page,
+                'total': total
             }
-        }), 200
+        })
+        return set_validators(response, etag), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get events', 'details': str(e)}), 500
 
@@ -113,22 +167,33 @@ def api_events():
 def api_get_event(event_id):
     """API endpoint to get specific event"""
     try:
-        from auth import get_current_user
         user = get_current_user()
         user_type = session.get('user_type')
         
-        event = Event.query.get_or_404(event_id)
+        # Validate with a two-column lookup before loading the event
+        validator = db.session.execute(
+            select(Event.event_manager_id, Event.updated_at).where(Event.event_id == event_id)
+        ).first()
+        if validator is None:
+            return jsonify({'error': 'Event not found'}), 404
         
         # Check access control for event managers
         if user_type == 'event_manager':
             # Event managers can only view their own events
-            if event.event_manager_id != user.event_manager_id:
+            if validator.event_manager_id != user.event_manager_id:
                 return jsonify({'error': 'Access denied. You can only view your own events.'}), 403
         
-        return jsonify({
+        etag = make_etag('event', event_id, validator.updated_at)
+        cached = not_modified(etag, validator.updated_at)
+        if cached is not None:
+            return cached
+        
+        event = Event.query.get_or_404(event_id)
+        response = jsonify({
             'success': True,
             'event': event.to_dict()
-        }), 200
+        })
+        return set_validators(response, etag, validator.updated_at), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get event', 'details': str(e)}), 500
 
@@ -158,39 +223,23 @@ def api_register_event(event_id):
         
         # Check if event has available spots (exclude cancelled and rejected registrations)
         if event.total_spots:
-            from models import RegistrationStatus
-            # Get status IDs that should NOT count towards available spots (cancelled, rejected)
-            excluded_statuses = RegistrationStatus.query.filter(
-                or_(
-                    func.lower(RegistrationStatus.status_name).like('%cancel%'),
-                    func.lower(RegistrationStatus.status_name).like('%reject%'),
-                    func.lower(RegistrationStatus.status_name).like('%declined%')
-                )
-            ).all()
-            excluded_status_ids = [s.registration_status_id for s in excluded_statuses]
-            
-            # Count only active registrations (not cancelled/rejected)
-            if excluded_status_ids:
-                current_registrations = Registration.query.filter(
-                    Registration.event_id == event_id,
-                    ~Registration.registration_status_id.in_(excluded_status_ids)
-                ).count()
-            else:
-                # If no excluded statuses found, count all (fallback)
-                current_registrations = Registration.query.filter_by(event_id=event_id).count()
+            # active_registration_count excludes cancelled and rejected registrations
+            current_registrations = event.active_registration_count
             
             if current_registrations >= event.total_spots:
                 return jsonify({'error': 'This event is full. No more spots available.'}), 400
         
-        # Create new registration
-        registration = Registration(
-            event_id=event_id,
-            participant_id=participant_id,
-            registration_status_id=1,  # Pending status
-            additional_info=request.json.get('additional_info', '')
+        # Reserve a spot and create the registration atomically (the check above may be stale under load)
+        registration = create_registration(
+            event_id,
+            participant_id,
+            reference_data.pending_status_id(),
+            request.json.get('additional_info', '')
         )
+        if registration is None:
+            db.session.rollback()
+            return jsonify({'error': 'This event is full. No more spots available.'}), 400
         
-        db.session.add(registration)
         db.session.commit()
         
         return jsonify({
@@ -216,7 +265,8 @@ def api_my_registrations():
         
         return jsonify({
             'success': True,
-            'registrations': [reg.to_dict() for reg in registrations]
+            'registrations': [reg.to_dict() for reg in registrations],
+            'summary': participant_summary(participant_id)
         }), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get registrations', 'details': str(e)}), 500
@@ -244,6 +294,7 @@ def api_delete_event_manager(manager_id):
         
         db.session.delete(event_manager)
         db.session.commit()
+        invalidate_principal('event_manager', manager_id)
         
         return jsonify({
             'success': True,
@@ -281,40 +332,19 @@ def api_update_registration_status(registration_id):
             return jsonify({'error': 'Access denied. You can only update registrations for your own events.'}), 403
         
         # Verify the status exists
-        from models import RegistrationStatus
-        status = RegistrationStatus.query.get(new_status_id)
-        if not status:
+        status_category = reference_data.registration_status_category(new_status_id)
+        if not status_category:
             return jsonify({'error': 'Invalid registration status'}), 400
         
         # Check if trying to approve and if event has available spots
-        status_name_lower = status.status_name.lower()
-        is_approving = 'approved' in status_name_lower or 'accept' in status_name_lower or 'confirmed' in status_name_lower
+        is_approving = status_category == 'approved'
         
         if is_approving and event.total_spots:
-            # Get current approved registrations count
-            approved_statuses = RegistrationStatus.query.filter(
-                or_(
-                    func.lower(RegistrationStatus.status_name).like('%approved%'),
-                    func.lower(RegistrationStatus.status_name).like('%accept%'),
-                    func.lower(RegistrationStatus.status_name).like('%confirm%')
-                )
-            ).all()
-            approved_status_ids = [s.registration_status_id for s in approved_statuses]
-            
-            # Count currently approved registrations for this event
-            current_approved_count = Registration.query.filter(
-                Registration.event_id == event.event_id,
-                Registration.registration_status_id.in_(approved_status_ids)
-            ).count()
+            # Currently approved registrations for this event
+            current_approved_count = event.approved_count
             
             # Check if current registration is already approved (if changing from approved to approved, no change)
-            current_registration_status = RegistrationStatus.query.get(registration.registration_status_id)
-            is_currently_approved = False
-            if current_registration_status:
-                current_status_name_lower = current_registration_status.status_name.lower()
-                is_currently_approved = ('approved' in current_status_name_lower or 
-                                        'accept' in current_status_name_lower or 
-                                        'confirm' in current_status_name_lower)
+            is_currently_approved = reference_data.registration_status_category(registration.registration_status_id) == 'approved'
             
             # If not currently approved, we're adding a new approval
             if not is_currently_approved:
@@ -325,7 +355,11 @@ def api_update_registration_status(registration_id):
         
         # Update registration status
         from datetime import datetime
-        registration.registration_status_id = new_status_id
+        if not record_status_change(registration, new_status_id, limit='approved'):
+            db.session.rollback()
+            return jsonify({
+                'error': f'Cannot approve registration. Event is full ({event.total_spots} spots available).'
+            }), 400
         registration.status_updated_at = datetime.utcnow()
         registration.updated_by_event_manager_id = user.event_manager_id
         
@@ -341,6 +375,54 @@ def api_update_registration_status(registration_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to update registration status', 'details': str(e)}), 500
 
+@api_bp.route('/events/<int:event_id>/registrations/status', methods=['PUT'])
+@login_required
+def api_bulk_update_registration_status(event_id):
+    """API endpoint for event managers to update many registration statuses of one event at once"""
+    try:
+        user = get_current_user()
+        user_type = session.get('user_type')
+        
+        # Only event managers can update registration status
+        if user_type != 'event_manager':
+            return jsonify({'error': 'Access denied. Only event managers can update registration status.'}), 403
+        
+        # Accept {"updates": [{"registration_id": 1, "registration_status_id": 2}, ...]} or a list of [id, status] pairs
+        data = request.get_json(silent=True)
+        updates = data.get('updates') if isinstance(data, dict) else data
+        if not isinstance(updates, list) or not updates:
+            return jsonify({'error': 'A non-empty list of updates is required'}), 400
+        if len(updates) > MAX_BULK_STATUS_UPDATES:
+            return jsonify({'error': f'At most {MAX_BULK_STATUS_UPDATES} updates can be sent at once'}), 400
+        try:
+            changes = [
+                (int(item['registration_id']), int(item['registration_status_id'])) if isinstance(item, dict)
+                else (int(item[0]), int(item[1]))
+                for item in updates
+            ]
+        except (KeyError, IndexError, TypeError, ValueError):
+            return jsonify({'error': 'Each update needs a registration_id and a registration_status_id'}), 400
+        
+        # Verify the event belongs to this event manager (once for the whole batch)
+        event = Event.query.get_or_404(event_id)
+        if event.event_manager_id != user.event_manager_id:
+            return jsonify({'error': 'Access denied. You can only update registrations for your own events.'}), 403
+        
+        results = apply_status_changes(event_id, changes, updated_by_event_manager_id=user.event_manager_id)
+        db.session.commit()
+        
+        summary = {outcome: sum(1 for r in results if r['result'] == outcome) for outcome in ('updated', 'unchanged', 'failed')}
+        return jsonify({
+            'success': True,
+            'message': f"{summary['updated']} registration(s) updated",
+            'summary': summary,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update registration statuses', 'details': str(e)}), 500
+
 @api_bp.route('/cancel-registration/<int:event_id>', methods=['POST'])
 @login_required
 def api_cancel_registration(event_id):
@@ -366,32 +448,17 @@ def api_cancel_registration(event_id):
             return jsonify({'error': 'Registration not found for this event.'}), 404
         
         # Check if already cancelled
-        from models import RegistrationStatus
-        if registration.registration_status:
-            status_name_lower = registration.registration_status.status_name.lower()
-            if 'cancel' in status_name_lower:
-                return jsonify({'error': 'Registration is already cancelled.'}), 400
-        
-        # Find or get cancelled status
-        cancelled_status = RegistrationStatus.query.filter(
-            func.lower(RegistrationStatus.status_name).like('%cancel%')
-        ).first()
+        if reference_data.registration_status_category(registration.registration_status_id) == 'cancelled':
+            return jsonify({'error': 'Registration is already cancelled.'}), 400
         
-        # If cancelled status doesn't exist, try to find a rejected status as fallback
-        if not cancelled_status:
-            cancelled_status = RegistrationStatus.query.filter(
-                func.lower(RegistrationStatus.status_name).like('%reject%')
-            ).first()
-        
-        # If still not found, get the first available status (shouldn't happen in production)
-        if not cancelled_status:
-            cancelled_status = RegistrationStatus.query.first()
-            if not cancelled_status:
-                return jsonify({'error': 'Registration system error: No registration statuses found.'}), 500
+        # Cancelled status, falling back to a rejected status (or the first available one)
+        cancelled_status_id = reference_data.cancelled_status_id()
+        if not cancelled_status_id:
+            return jsonify({'error': 'Registration system error: No registration statuses found.'}), 500
         
         # Update registration status to cancelled
         from datetime import datetime
-        registration.registration_status_id = cancelled_status.registration_status_id
+        record_status_change(registration, cancelled_status_id)
         registration.status_updated_at = datetime.utcnow()
         registration.updated_by_event_manager_id = None  # Participant cancelled, not event manager
         
@@ -430,6 +497,7 @@ def api_delete_participant(participant_id):
         
         db.session.delete(participant)
         db.session.commit()
+        invalidate_principal('participant', participant_id)
         
         return jsonify({
             'success': True,
@@ -440,6 +508,56 @@ def api_delete_participant(participant_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to delete participant', 'details': str(e)}), 500
 
+@api_bp.route('/participants/import', methods=['POST'])
+@login_required
+def api_import_participants():
+    """API endpoint for admins to bulk-create participants from a CSV upload"""
+    try:
+        if session.get('user_type') != 'admin':
+            return jsonify({'error': 'Access denied. Only admins can import participants.'}), 403
+        
+        # Multipart upload (field "file") or a raw text/csv request body, read as a stream
+        upload = request.files.get('file')
+        raw = upload.stream if upload else request.stream
+        # Every row is password-hashed, so large files would outlast the request timeout; they go through the CLI
+        max_rows = current_app.config.get('IMPORT_MAX_API_ROWS', 500)
+        spooled = spool_csv(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''), max_rows)
+        if spooled is None:
+            return jsonify({
+                'error': f'Files with more than {max_rows} rows must be imported with '
+                         '`flask --app app import-participants <file>`'
+            }), 413
+        batch_size = request.args.get('batch_size', current_app.config.get('IMPORT_BATCH_SIZE', 500), type=int)
+        with spooled:
+            report = import_participants(spooled, batch_size=max(1, batch_size))
+        
+        result = report.to_dict()
+        if request.args.get('include_invites') == 'true':
+            result['invites'] = [{'email': email, 'invite_token': token} for email, token in report.invites]
+        return jsonify({'success': True, **result}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import participants', 'details': str(e)}), 500
+
+@api_bp.route('/registrations/export.ndjson', methods=['GET'])
+@login_required
+def api_export_registrations():
+    """API endpoint for admins to stream registrations as NDJSON (resumable with after_id)"""
+    if session.get('user_type') != 'admin':
+        return jsonify({'error': 'Access denied. Only admins can export registrations.'}), 403
+    
+    try:
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO dates (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)'}), 400
+    after_id = request.args.get('after_id', 0, type=int)
+    chunk_size = min(max(request.args.get('chunk_size', 1000, type=int), 1), 10000)
+    
+    records = registration_records(after_id=after_id, since=since, until=until, chunk_size=chunk_size)
+    return Response(stream_with_context(ndjson_stream(records)), mimetype='application/x-ndjson')
+
 @api_bp.route('/health', methods=['GET'])
 def api_health():
     """API health check endpoint"""
@@ -450,7 +568,8 @@ def api_health():
         return jsonify({
             'success': True,
             'message': 'API is healthy',
-            'database': 'connected'
+            'database': 'connected',
+            'password_hashing': hasher.stats()
         }), 200
     except Exception as e:
         return jsonify({
@@ -459,3 +578,15 @@ def api_health():
             'database': 'disconnected',
             'error': str(e)
         }), 500
+
+@api_bp.route('/metrics', methods=['GET'])
+@login_required
+def api_metrics():
+    """API endpoint for admins to view per-endpoint SQL query metrics"""
+    if session.get('user_type') != 'admin':
+        return jsonify({'error': 'Access denied. Only admins can view metrics.'}), 403
+    
+    return jsonify({
+        'success': True,
+        'sql': instrumentation.snapshot()
+    }), 200
@@ -1,20 +1,62 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
 from models import db, Admin, EventManager, Participant, Event, Registration, EventType, EventStatus, RegistrationStatus
-from auth import authenticate_user, login_user, logout_user, login_required, get_current_user
+from auth import authenticate_user, login_user, logout_user, login_required, get_current_user, email_exists, invalidate_principal
 from api import api_bp
+from passwords import hasher
+from reference_data import reference_data
+from seats import create_registration
+from commands import register_commands
+from search import apply_event_search, apply_person_search
+from pagination import keyset_paginate, attach_next_cursor
+from dashboard_stats import dashboard_stats, manager_dashboard_stats, participant_summary
+from instrumentation import instrumentation
+from series import expand_recurrence, create_event_series, parse_repeat_form, SeriesError
+from exports import ATTENDEE_HEADER, attendee_rows, csv_stream
+from response_cache import listing_cache
+from templating import fragment_cache, template_compilation
+from assets import assets
+from metrics import metrics
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Prometheus metrics at /metrics (before the database so the pool is instrumented)
+metrics.init_app(app)
+
 # Initialize database
 db.init_app(app)
 
+# Configure password hashing (cost and worker pool come from Config)
+hasher.init_app(app)
+
+# Cache lookup tables (event types/statuses, registration statuses) in memory
+reference_data.init_app(app)
+dashboard_stats.init_app(app)
+
+# Per-request SQL query counting and N+1 detection (off unless SQL_INSTRUMENTATION is set)
+instrumentation.init_app(app)
+
+# Cache of event listing pages, invalidated whenever an event is written
+listing_cache.init_app(app)
+
+# {% cache %} tag for pre-rendered event cards
+fragment_cache.init_app(app)
+
+# Persistent template bytecode cache; precompiles every template at startup when TEMPLATE_WARMUP is set
+template_compilation.init_app(app)
+
+# Fingerprinted, precompressed static assets (asset_url() in templates, built by `flask build-assets`)
+assets.init_app(app)
+
 # Register API blueprint
 app.register_blueprint(api_bp)
 
+# Register maintenance CLI commands
+register_commands(app)
+
 # Context processor to make current user available in all templates
 @app.context_processor
 def inject_user():
@@ -32,50 +74,20 @@ def home():
     from datetime import datetime
     
     if user_type == 'admin':
-        # Admin dashboard statistics
-        stats = {
-            'total_admins': Admin.query.count(),
-            'total_event_managers': EventManager.query.count(),
-            'total_participants': Participant.query.count(),
-            'total_events': Event.query.count(),
-            'total_registrations': Registration.query.count(),
-            'upcoming_events': Event.query.filter(Event.event_date > datetime.utcnow()).count(),
-            'recent_events': Event.query.order_by(Event.created_at.desc()).limit(5).all()
-        }
+        # Admin dashboard statistics (materialized snapshot, see dashboard_stats.py)
+        stats = dashboard_stats.get()
         return render_template('dashboard_admin.html', user=user, stats=stats)
     
     elif user_type == 'event_manager':
-        # Event Manager dashboard statistics
-        my_events = Event.query.filter_by(event_manager_id=user.event_manager_id).all()
-        upcoming_events = [e for e in my_events if e.event_date > datetime.utcnow()]
-        
-        # Count registrations for all events managed by this event manager
-        total_registrations = 0
-        if my_events:
-            my_event_ids = [e.event_id for e in my_events]
-            total_registrations = Registration.query.filter(Registration.event_id.in_(my_event_ids)).count()
-        
-        stats = {
-            'total_events': len(my_events),
-            'upcoming_events': len(upcoming_events),
-            'total_registrations': total_registrations,
-            'recent_events': Event.query.filter_by(event_manager_id=user.event_manager_id).order_by(Event.created_at.desc()).limit(5).all()
-        }
+        # Event Manager dashboard statistics (SQL aggregates, no per-event loading)
+        stats = manager_dashboard_stats(user.event_manager_id)
         return render_template('dashboard_event_manager.html', user=user, stats=stats)
     
     else:  # participant
-        # Participant dashboard statistics
-        upcoming_events_all = Event.query.filter(Event.event_date > datetime.utcnow()).count()
-        my_registrations = Registration.query.filter_by(participant_id=user.participant_id).all()
-        my_registered_events = [reg.event for reg in my_registrations]
-        upcoming_registered = [e for e in my_registered_events if e.event_date > datetime.utcnow()]
-        
-        stats = {
-            'available_events': upcoming_events_all,
-            'my_registrations': len(my_registrations),
-            'upcoming_registered': len(upcoming_registered),
-            'recent_events': Event.query.filter(Event.event_date > datetime.utcnow()).order_by(Event.event_date.asc()).limit(5).all()
-        }
+        # Participant dashboard statistics (one grouped query over registrations joined to events)
+        stats = participant_summary(user.participant_id)
+        stats['available_events'] = Event.query.filter(Event.event_date > datetime.utcnow()).count()
+        stats['recent_events'] = Event.query.filter(Event.event_date > datetime.utcnow()).order_by(Event.event_date.asc()).limit(5).all()
         return render_template('dashboard_participant.html', user=user, stats=stats)
 
 @app.route('/profile', methods=['GET', 'POST'])
@@ -99,6 +111,7 @@ def profile():
         # Persist changes
         try:
             db.session.commit()
+            invalidate_principal(user_type, session.get('user_id'))
             message = 'Profile updated successfully.'
         except Exception:
             db.session.rollback()
@@ -106,6 +119,16 @@ def profile():
 
     return render_template('profile.html', user=user, message=message)
 
+def _listing_params(page, per_page, search_query):
+    """Request parameters that select one page of an event listing (cache key part)"""
+    return {
+        'page': page,
+        'per_page': per_page,
+        'search': search_query,
+        'cursor': request.args.get('cursor'),
+        'total': request.args.get('total')
+    }
+
 @app.route('/events')
 @login_required
 def events():
@@ -117,25 +140,36 @@ def events():
     page = request.args.get('page', 1, type=int)
     per_page = 12  # Events per page
     
-    # Build base query
-    if user_type == 'event_manager':
-        # Event managers only see their own events
-        query = Event.query.filter_by(event_manager_id=user.event_manager_id)
-    elif user_type == 'admin':
-        # Admins see all events
-        query = Event.query
-    else:
-        # Participants see all events (to register)
-        query = Event.query
-    
-    # Apply search filter if provided
-    if search_query:
-        from sqlalchemy import func
-        query = query.filter(func.lower(Event.event_name).like(f'%{search_query.lower()}%'))
-    
-    # Order by event date and paginate
-    query = query.order_by(Event.event_date.asc())
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    def load_page():
+        # Build base query
+        if user_type == 'event_manager':
+            # Event managers only see their own events
+            query = Event.query.filter_by(event_manager_id=user.event_manager_id)
+        elif user_type == 'admin':
+            # Admins see all events
+            query = Event.query
+        else:
+            # Participants see all events (to register)
+            query = Event.query
+        
+        # Apply full-text search if provided (best matches first)
+        relevance = []
+        if search_query:
+            query, relevance = apply_event_search(query, search_query)
+        
+        # Order by event date and paginate (keyset mode when a cursor parameter is present)
+        if 'cursor' in request.args:
+            return keyset_paginate(query, [Event.event_date, Event.event_id], request.args.get('cursor'), per_page,
+                                   total=request.args.get('total'),
+                                   approx_table='event' if user_type != 'event_manager' and not search_query else None)
+        query = query.order_by(*relevance, Event.event_date.asc(), Event.event_id.asc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Next links switch to keyset mode, except for relevance-ranked search results
+        return attach_next_cursor(pagination, [Event.event_date, Event.event_id]) if not relevance else pagination
+    
+    # Admins and participants share one cached listing, event managers get their own
+    scope = f'event_manager:{user.event_manager_id}' if user_type == 'event_manager' else 'all'
+    pagination = listing_cache.get_or_compute('events', scope, _listing_params(page, per_page, search_query), load_page)
     
     return render_template('events.html', events=pagination.items, pagination=pagination, search_query=search_query)
 
@@ -148,8 +182,7 @@ def registered_events():
         # For participants, get their registrations with status
         from sqlalchemy.orm import joinedload
         registrations = Registration.query.options(
-            joinedload(Registration.event),
-            joinedload(Registration.registration_status)
+            joinedload(Registration.event)
         ).filter_by(participant_id=user.participant_id).order_by(Registration.registered_at.desc()).all()
         
         # Create a list of tuples (event, registration) for easy access in template
@@ -164,7 +197,6 @@ def upcoming_events():
     user = get_current_user()
     user_type = session.get('user_type')
     from datetime import datetime
-    from sqlalchemy import func
     
     # Get current datetime for comparison - only show events with event_date in the future
     current_time = datetime.utcnow()
@@ -174,31 +206,43 @@ def upcoming_events():
     page = request.args.get('page', 1, type=int)
     per_page = 12  # Events per page
     
-    # Build base query with date filter (only future events)
-    if user_type == 'event_manager':
-        # Event managers only see their own upcoming events (event_date must be > current_time)
-        query = Event.query.filter(
-            Event.event_manager_id == user.event_manager_id,
-            Event.event_date > current_time  # Only future events
-        )
-    elif user_type == 'admin':
-        # Admins see all upcoming events (event_date must be > current_time)
-        query = Event.query.filter(
-            Event.event_date > current_time  # Only future events
-        )
-    else:
-        # Participants see all upcoming events (event_date must be > current_time)
-        query = Event.query.filter(
-            Event.event_date > current_time  # Only future events
-        )
-    
-    # Apply search filter if provided
-    if search_query:
-        query = query.filter(func.lower(Event.event_name).like(f'%{search_query.lower()}%'))
-    
-    # Order by event date and paginate
-    query = query.order_by(Event.event_date.asc())
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    def load_page():
+        # Build base query with date filter (only future events)
+        if user_type == 'event_manager':
+            # Event managers only see their own upcoming events (event_date must be > current_time)
+            query = Event.query.filter(
+                Event.event_manager_id == user.event_manager_id,
+                Event.event_date > current_time  # Only future events
+            )
+        elif user_type == 'admin':
+            # Admins see all upcoming events (event_date must be > current_time)
+            query = Event.query.filter(
+                Event.event_date > current_time  # Only future events
+            )
+        else:
+            # Participants see all upcoming events (event_date must be > current_time)
+            query = Event.query.filter(
+                Event.event_date > current_time  # Only future events
+            )
+        
+        # Apply full-text search if provided (best matches first)
+        relevance = []
+        if search_query:
+            query, relevance = apply_event_search(query, search_query)
+        
+        # Order by event date and paginate (keyset mode when a cursor parameter is present)
+        if 'cursor' in request.args:
+            return keyset_paginate(query, [Event.event_date, Event.event_id], request.args.get('cursor'), per_page,
+                                   total=request.args.get('total'))
+        query = query.order_by(*relevance, Event.event_date.asc(), Event.event_id.asc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Next links switch to keyset mode, except for relevance-ranked search results
+        return attach_next_cursor(pagination, [Event.event_date, Event.event_id]) if not relevance else pagination
+        
+    # Admins and participants share one cached listing, event managers get their own (the TTL bounds
+    # how long an event that has just started can linger in a cached page)
+    scope = f'event_manager:{user.event_manager_id}' if user_type == 'event_manager' else 'all'
+    pagination = listing_cache.get_or_compute('upcoming_events', scope, _listing_params(page, per_page, search_query), load_page)
     
     return render_template('upcoming_events.html', events=pagination.items, pagination=pagination, search_query=search_query)
 
@@ -214,8 +258,8 @@ def add_event():
     
     if request.method == 'GET':
         # Get event types and statuses for dropdowns
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         return render_template('add_event.html', event_types=event_types, event_statuses=event_statuses)
     
     # Handle POST - create new event
@@ -232,13 +276,22 @@ def add_event():
     
     # Validation
     if not event_name or not event_date_str or not event_type_id or not event_status_id:
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         return render_template('add_event.html', 
                              event_types=event_types, 
                              event_statuses=event_statuses,
                              error='Please fill in all required fields (Event Name, Date, Type, and Status)')
     
+    # Repeat fields are checked up front so bad values get their own message
+    try:
+        repeat = parse_repeat_form(request.form)
+    except SeriesError as e:
+        return render_template('add_event.html',
+                             event_types=reference_data.event_types(),
+                             event_statuses=reference_data.event_statuses(),
+                             error=str(e))
+    
     try:
         from datetime import datetime
         
@@ -266,6 +319,31 @@ def add_event():
             except ValueError:
                 pass
         
+        # Repeating event: expand the rule and insert every occurrence in one transaction
+        if repeat:
+            repeat_frequency, repeat_interval, repeat_until, repeat_count = repeat
+            try:
+                occurrences = expand_recurrence(event_date, repeat_frequency, interval=repeat_interval,
+                                                until=repeat_until, count=repeat_count)
+                create_event_series({
+                    'event_manager_id': user.event_manager_id,
+                    'event_type_id': int(event_type_id),
+                    'event_status_id': int(event_status_id),
+                    'event_name': event_name,
+                    'event_description': event_description or None,
+                    'location': location,
+                    'total_spots': total_spots_int,
+                    'registration_deadline': registration_deadline
+                }, occurrences)
+            except SeriesError as e:
+                db.session.rollback()
+                return render_template('add_event.html',
+                                     event_types=reference_data.event_types(),
+                                     event_statuses=reference_data.event_statuses(),
+                                     error=str(e))
+            db.session.commit()
+            return redirect(url_for('events'))
+        
         # Create new event
         new_event = Event(
             event_manager_id=user.event_manager_id,
@@ -286,16 +364,16 @@ def add_event():
         return redirect(url_for('events'))
         
     except ValueError as e:
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         return render_template('add_event.html', 
                              event_types=event_types, 
                              event_statuses=event_statuses,
                              error=f'Invalid date format: {str(e)}')
     except Exception as e:
         db.session.rollback()
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         return render_template('add_event.html', 
                              event_types=event_types, 
                              event_statuses=event_statuses,
@@ -322,32 +400,78 @@ def event_detail(event_id):
     approved_count = 0
     if user_type == 'event_manager' or user_type == 'admin':
         from sqlalchemy.orm import joinedload
-        from sqlalchemy import or_, func
         registrations = Registration.query.options(
-            joinedload(Registration.participant),
-            joinedload(Registration.registration_status)
+            joinedload(Registration.participant)
         ).filter_by(event_id=event_id).order_by(Registration.registered_at.desc()).all()
         
         # Get all available registration statuses for dropdown
-        registration_statuses = RegistrationStatus.query.all()
+        registration_statuses = reference_data.registration_statuses()
         
         # Calculate approved registrations count
         if event.total_spots:
-            approved_statuses = RegistrationStatus.query.filter(
-                or_(
-                    func.lower(RegistrationStatus.status_name).like('%approved%'),
-                    func.lower(RegistrationStatus.status_name).like('%accept%'),
-                    func.lower(RegistrationStatus.status_name).like('%confirm%')
-                )
-            ).all()
-            approved_status_ids = [s.registration_status_id for s in approved_statuses]
-            approved_count = Registration.query.filter(
-                Registration.event_id == event_id,
-                Registration.registration_status_id.in_(approved_status_ids)
-            ).count()
+            approved_count = event.approved_count
     
     return render_template('event_detail.html', event=event, registrations=registrations, registration_statuses=registration_statuses, user_type=user_type, approved_count=approved_count)
 
+def _attendee_status_filter():
+    """Registration status ids selected by ?status=<id> and/or ?category=<name> (None = all).
+
+    An unknown status id or category is a 400 rather than being ignored,
+    which would widen the export to every attendee.
+    """
+    known_ids = reference_data.registration_status_names()
+    status_ids = set()
+    for value in request.args.getlist('status'):
+        try:
+            status_id = int(value)
+        except ValueError:
+            status_id = None
+        if status_id not in known_ids:
+            abort(400, description=f'Unknown registration status: {value}')
+        status_ids.add(status_id)
+    categories = request.args.getlist('category')
+    for category in categories:
+        if not reference_data.registration_status_ids(category):
+            abort(400, description=f'Unknown registration status category: {category}')
+    if categories:
+        status_ids |= reference_data.registration_status_ids(*categories)
+    return status_ids if status_ids or categories else None
+
+def _csv_download(rows, filename):
+    return Response(
+        stream_with_context(csv_stream(ATTENDEE_HEADER, rows)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/events/<int:event_id>/attendees.csv')
+@login_required
+def event_attendees_csv(event_id):
+    user = get_current_user()
+    user_type = session.get('user_type')
+    
+    # Event managers can export their own events, admins any event
+    if user_type not in ('event_manager', 'admin'):
+        abort(403)
+    event = Event.query.get_or_404(event_id)
+    if user_type == 'event_manager' and event.event_manager_id != user.event_manager_id:
+        abort(403)
+    
+    rows = attendee_rows(event_id=event_id, status_ids=_attendee_status_filter())
+    return _csv_download(rows, f'event-{event_id}-attendees.csv')
+
+@app.route('/events/attendees.csv')
+@login_required
+def all_attendees_csv():
+    user_type = session.get('user_type')
+    
+    # Only admins can export attendees across all events
+    if user_type != 'admin':
+        abort(403)
+    
+    rows = attendee_rows(status_ids=_attendee_status_filter())
+    return _csv_download(rows, 'attendees.csv')
+
 @app.route('/edit_event/<int:event_id>', methods=['GET', 'POST'])
 @login_required
 def edit_event(event_id):
@@ -366,8 +490,8 @@ def edit_event(event_id):
     
     if request.method == 'GET':
         # Get event types and statuses for dropdowns
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         
         # Format dates for the form inputs
         event_date_str = event.event_date.strftime('%Y-%m-%d') if event.event_date else ''
@@ -398,8 +522,8 @@ def edit_event(event_id):
     
     # Validation
     if not event_name or not event_date_str or not event_type_id or not event_status_id:
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         event_date_str = event.event_date.strftime('%Y-%m-%d') if event.event_date else ''
         event_time_str = event.event_date.strftime('%H:%M') if event.event_date else ''
         registration_deadline_date_str = event.registration_deadline.strftime('%Y-%m-%d') if event.registration_deadline else ''
@@ -458,8 +582,8 @@ def edit_event(event_id):
         return redirect(url_for('event_detail', event_id=event_id))
         
     except ValueError as e:
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         event_date_str = event.event_date.strftime('%Y-%m-%d') if event.event_date else ''
         event_time_str = event.event_date.strftime('%H:%M') if event.event_date else ''
         registration_deadline_date_str = event.registration_deadline.strftime('%Y-%m-%d') if event.registration_deadline else ''
@@ -475,8 +599,8 @@ def edit_event(event_id):
                              error=f'Invalid date format: {str(e)}')
     except Exception as e:
         db.session.rollback()
-        event_types = EventType.query.all()
-        event_statuses = EventStatus.query.all()
+        event_types = reference_data.event_types()
+        event_statuses = reference_data.event_statuses()
         event_date_str = event.event_date.strftime('%Y-%m-%d') if event.event_date else ''
         event_time_str = event.event_date.strftime('%H:%M') if event.event_date else ''
         registration_deadline_date_str = event.registration_deadline.strftime('%Y-%m-%d') if event.registration_deadline else ''
@@ -522,30 +646,9 @@ def register_event(event_id):
                              event=event, 
                              error='Registration deadline has passed for this event.')
     
-    # Check if event has available spots (exclude cancelled and rejected registrations)
+    # Check if event has available spots (active_registration_count excludes cancelled and rejected registrations)
     if event.total_spots:
-        from sqlalchemy import or_, func
-        from models import RegistrationStatus
-        
-        # Get status IDs that should NOT count towards available spots (cancelled, rejected)
-        excluded_statuses = RegistrationStatus.query.filter(
-            or_(
-                func.lower(RegistrationStatus.status_name).like('%cancel%'),
-                func.lower(RegistrationStatus.status_name).like('%reject%'),
-                func.lower(RegistrationStatus.status_name).like('%declined%')
-            )
-        ).all()
-        excluded_status_ids = [s.registration_status_id for s in excluded_statuses]
-        
-        # Count only active registrations (not cancelled/rejected)
-        if excluded_status_ids:
-            current_registrations = Registration.query.filter(
-                Registration.event_id == event_id,
-                ~Registration.registration_status_id.in_(excluded_status_ids)
-            ).count()
-        else:
-            # If no excluded statuses found, count all (fallback)
-            current_registrations = Registration.query.filter_by(event_id=event_id).count()
+        current_registrations = event.active_registration_count
         
         if current_registrations >= event.total_spots:
             return render_template('register_event.html', 
@@ -559,35 +662,23 @@ def register_event(event_id):
     additional_info = request.form.get('additional_info', '').strip()
     
     try:
-        from sqlalchemy import func
-        # Get default pending status - try multiple variations
-        pending_status = RegistrationStatus.query.filter(
-            func.lower(RegistrationStatus.status_name) == 'pending'
-        ).first()
-        
-        # If still not found, try status_id = 1 (common default)
-        if not pending_status:
-            pending_status = RegistrationStatus.query.filter_by(registration_status_id=1).first()
-        
-        # If still not found, get the first available status
-        if not pending_status:
-            pending_status = RegistrationStatus.query.first()
+        # Default status for new registrations (Pending, falling back to id 1 or the first status)
+        pending_status_id = reference_data.pending_status_id()
         
         # Final check - if no statuses exist at all
-        if not pending_status:
+        if not pending_status_id:
             return render_template('register_event.html', 
                                  event=event, 
                                  error='Registration system error: No registration statuses found.')
         
-        # Create new registration
-        registration = Registration(
-            event_id=event_id,
-            participant_id=user.participant_id,
-            registration_status_id=pending_status.registration_status_id,
-            additional_info=additional_info or None
-        )
+        # Reserve a spot and create the registration atomically (the check above may be stale under load)
+        registration = create_registration(event_id, user.participant_id, pending_status_id, additional_info or None)
+        if registration is None:
+            db.session.rollback()
+            return render_template('register_event.html', 
+                                 event=event, 
+                                 error='This event is full. No more spots available.')
         
-        db.session.add(registration)
         db.session.commit()
         
         # Redirect to registered events page or event detail page
@@ -633,11 +724,7 @@ def add_event_manager():
         return render_template('add_event_manager.html', error='Password must be at least 6 characters long.')
     
     # Check if email already exists
-    existing_manager = EventManager.query.filter_by(email=email).first()
-    existing_admin = Admin.query.filter_by(email=email).first()
-    existing_participant = Participant.query.filter_by(email=email).first()
-    
-    if existing_manager or existing_admin or existing_participant:
+    if email_exists(email):
         return render_template('add_event_manager.html', 
                              error='Email already exists. Please use a different email address.')
     
@@ -683,14 +770,20 @@ def all_event_managers():
     # Build base query
     query = EventManager.query
     
-    # Apply search filter if provided (search by email)
+    # Apply search filter if provided (email, first or last name via the trigram index)
     if search_query:
-        from sqlalchemy import func
-        query = query.filter(func.lower(EventManager.email).like(f'%{search_query.lower()}%'))
+        query = apply_person_search(query, 'event_manager', search_query)
     
-    # Order by created_at and paginate
-    query = query.order_by(EventManager.created_at.desc())
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Order by created_at and paginate (keyset mode when a cursor parameter is present)
+    if 'cursor' in request.args:
+        pagination = keyset_paginate(query, [EventManager.created_at, EventManager.event_manager_id], request.args.get('cursor'),
+                                     per_page, descending=True, total=request.args.get('total'),
+                                     approx_table='event_manager' if not search_query else None)
+    else:
+        query = query.order_by(EventManager.created_at.desc(), EventManager.event_manager_id.desc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # The Next link continues in keyset mode rather than with a deeper OFFSET
+        attach_next_cursor(pagination, [EventManager.created_at, EventManager.event_manager_id])
     
     return render_template('all_event_managers.html', 
                          event_managers=pagination.items,
@@ -743,11 +836,7 @@ def edit_event_manager(manager_id):
     
     # Check if email already exists (but not for current manager)
     if email != event_manager.email:
-        existing_manager = EventManager.query.filter_by(email=email).first()
-        existing_admin = Admin.query.filter_by(email=email).first()
-        existing_participant = Participant.query.filter_by(email=email).first()
-        
-        if existing_manager or existing_admin or existing_participant:
+        if email_exists(email):
             return render_template('edit_event_manager.html', 
                                  manager=event_manager,
                                  error='Email already exists. Please use a different email address.')
@@ -766,6 +855,7 @@ def edit_event_manager(manager_id):
             event_manager.set_password(password)
         
         db.session.commit()
+        invalidate_principal('event_manager', event_manager.event_manager_id)
         
         # Redirect to all event managers page
         return redirect(url_for('all_event_managers'))
@@ -794,14 +884,20 @@ def all_participants():
     # Build base query
     query = Participant.query
     
-    # Apply search filter if provided (search by email)
+    # Apply search filter if provided (email, first or last name via the trigram index)
     if search_query:
-        from sqlalchemy import func
-        query = query.filter(func.lower(Participant.email).like(f'%{search_query.lower()}%'))
+        query = apply_person_search(query, 'participant', search_query)
     
-    # Order by created_at and paginate
-    query = query.order_by(Participant.created_at.desc())
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Order by created_at and paginate (keyset mode when a cursor parameter is present)
+    if 'cursor' in request.args:
+        pagination = keyset_paginate(query, [Participant.created_at, Participant.participant_id], request.args.get('cursor'),
+                                     per_page, descending=True, total=request.args.get('total'),
+                                     approx_table='participant' if not search_query else None)
+    else:
+        query = query.order_by(Participant.created_at.desc(), Participant.participant_id.desc())
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # The Next link continues in keyset mode rather than with a deeper OFFSET
+        attach_next_cursor(pagination, [Participant.created_at, Participant.participant_id])
     
     return render_template('all_participants.html', 
                          participants=pagination.items,
@@ -857,11 +953,7 @@ def edit_participant(participant_id):
     
     # Check if email already exists (but not for current participant)
     if email != participant.email:
-        existing_manager = EventManager.query.filter_by(email=email).first()
-        existing_admin = Admin.query.filter_by(email=email).first()
-        existing_participant = Participant.query.filter_by(email=email).first()
-        
-        if existing_manager or existing_admin or existing_participant:
+        if email_exists(email):
             return render_template('edit_participant.html', 
                                  participant=participant,
                                  error='Email already exists. Please use a different email address.')
@@ -883,6 +975,7 @@ def edit_participant(participant_id):
             participant.set_password(password)
         
         db.session.commit()
+        invalidate_principal('participant', participant.participant_id)
         
         # Redirect to all participants page
         return redirect(url_for('all_participants'))
@@ -925,11 +1018,7 @@ def signup():
         return render_template('signup.html', error='Password must be at least 6 characters long')
     
     # Check if email already exists in any user table
-    existing_participant = Participant.query.filter_by(email=email).first()
-    existing_admin = Admin.query.filter_by(email=email).first()
-    existing_manager = EventManager.query.filter_by(email=email).first()
-    
-    if existing_participant or existing_admin or existing_manager:
+    if email_exists(email):
         return render_template('signup.html', error='Email already registered. Please use a different email or sign in.')
     
     # Create new participant account (only Participant role can be created from signup)
@@ -980,12 +1069,7 @@ def submit_login():
         return redirect(url_for('home'))
     else:
         # Check if email exists but password is wrong
-        from models import Admin, EventManager, Participant
-        admin_exists = Admin.query.filter_by(email=email).first()
-        manager_exists = EventManager.query.filter_by(email=email).first()
-        participant_exists = Participant.query.filter_by(email=email).first()
-        
-        if admin_exists or manager_exists or participant_exists:
+        if email_exists(email):
             return render_template('login.html', error='Invalid password. Please check your password and try again.')
         else:
             return render_template('login.html', error='Invalid email or password. Please check your credentials and try again.')
@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from flask import abort, current_app, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz variants are written without it
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+# Built files never change under a given name, so clients may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ASSET_EXTENSIONS = ('.css', '.js')
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/|(\s+)', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+def minify_css(text):
+    """Drop comments and redundant whitespace from a stylesheet, leaving strings untouched"""
+    strings = []
+
+    def replace(match):
+        if match.group(1):
+            strings.append(match.group(1))
+            return f'\0{len(strings) - 1}\0'
+        return ' ' if match.group(2) else ''
+
+    text = _CSS_TOKENS.sub(replace, text)
+    text = _CSS_PUNCTUATION.sub(r'\1', text)
+    # Only the space after a colon can go; before one it may be a descendant combinator (`a :hover`)
+    text = text.replace(': ', ':').replace(';}', '}')
+    return re.sub(r'\0(\d+)\0', lambda match: strings[int(match.group(1))], text).strip()
+
+def _is_build_output(path, output_dir):
+    return os.path.abspath(path) == output_dir or os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+def build_assets(source_dir, output_dir):
+    """Minify and fingerprint the stylesheets and scripts in source_dir.
+
+    Each asset is written to output_dir as name.<hash>.ext, plus a .gz
+    variant and, when the brotli package is installed, a .br variant; a
+    manifest.json maps source names to built names. Returns the manifest.
+    Directories holding a manifest (this or any earlier build output) are
+    skipped, so built files are never fingerprinted again.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_dir = os.path.abspath(output_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if not _is_build_output(os.path.join(root, d), output_dir)]
+        for filename in sorted(files):
+            stem, extension = os.path.splitext(filename)
+            if extension not in ASSET_EXTENSIONS:
+                continue
+            path = os.path.join(root, filename)
+            with open(path, encoding='utf-8') as source:
+                text = source.read()
+            content = (minify_css(text) if extension == '.css' else text).encode('utf-8')
+
+            relative = os.path.relpath(path, source_dir).replace(os.sep, '/')
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            built = f'{os.path.splitext(relative)[0]}.{digest}{extension}'
+            target = os.path.join(output_dir, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as out:
+                out.write(content)
+            # mtime=0 keeps the .gz byte-identical across builds
+            with open(target + '.gz', 'wb') as out:
+                out.write(gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(target + '.br', 'wb') as out:
+                    out.write(brotli.compress(content, quality=11))
+            manifest[relative] = built
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+class AssetPipeline:
+    """Serve built assets under /assets with far-future caching and precompressed variants.
+
+    Templates call `asset_url('style.css')` instead of
+    `url_for('static', filename='style.css')`. Once `flask build-assets`
+    has written the manifest, it returns the fingerprinted URL; otherwise,
+    and always in debug mode, it falls back to the plain static file so
+    stylesheet edits show up without a rebuild. ASSET_BUILD_DIR sets the
+    output directory (default static/dist).
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config.get('ASSET_BUILD_DIR') or os.path.join(app.static_folder, 'dist')
+        self.load_manifest()
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.send_asset)
+        app.add_template_global(self.asset_url, 'asset_url')
+        app.extensions['assets'] = self
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME)) as manifest:
+                self.manifest = json.load(manifest)
+        except FileNotFoundError:
+            self.manifest = {}
+        self._built = set(self.manifest.values())
+
+    def build(self, source_dir):
+        manifest = build_assets(source_dir, self.directory)
+        self.load_manifest()
+        return manifest
+
+    def asset_url(self, filename):
+        built = self.manifest.get(filename)
+        if built is None or current_app.debug:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=built)
+
+    def send_asset(self, filename):
+        if filename not in self._built:
+            abort(404)
+        path = os.path.join(self.directory, filename)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidate] and os.path.exists(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+        response = send_file(path, mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+assets = AssetPipeline()
@@ -1,6 +1,20 @@
 from functools import wraps
-from flask import session, redirect, url_for, request, jsonify
-from models import Admin, EventManager, Participant
+from flask import session, redirect, url_for, request, jsonify, g, current_app
+from sqlalchemy import select, literal, union_all, inspect, func
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, Admin, EventManager, Participant
+from cache import TTLCache
+from passwords import hasher
+
+# Role tables in login priority order: (user_type, model, primary key column)
+USER_MODELS = (
+    ('admin', Admin, Admin.admin_id),
+    ('event_manager', EventManager, EventManager.event_manager_id),
+    ('participant', Participant, Participant.participant_id),
+)
+
+# Cross-request principal cache, created on first use when PRINCIPAL_CACHE_TTL is set
+_principal_cache = None
 
 def login_required(f):
     """Decorator to require login for routes"""
@@ -35,39 +49,120 @@ def event_manager_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def _get_principal_cache():
+    """Return the shared principal cache, or None when it is disabled"""
+    global _principal_cache
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 0)
+    if not ttl:
+        return None
+    if _principal_cache is None:
+        _principal_cache = TTLCache(maxsize=current_app.config.get('PRINCIPAL_CACHE_SIZE', 1024), ttl=ttl)
+    return _principal_cache
+
+def _load_principal(user_type, user_id):
+    """Load a user by (user_type, user_id), serving column data from the principal cache when possible"""
+    models = {account_type: model for account_type, model, _ in USER_MODELS}
+    model = models.get(user_type)
+    if model is None:
+        return None
+    
+    cache = _get_principal_cache()
+    if cache is not None:
+        state = cache.get((user_type, user_id))
+        if state is not None:
+            # Rebuild a detached instance and attach it to this request's session without a SELECT
+            user = model(**state)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+    
+    user = model.query.get(user_id)
+    if user is not None and cache is not None:
+        cache.set((user_type, user_id), {attr.key: getattr(user, attr.key) for attr in inspect(model).column_attrs})
+    return user
+
+def invalidate_principal(user_type, user_id):
+    """Drop a user from the principal cache after their account has been changed"""
+    if _principal_cache is not None:
+        _principal_cache.delete((user_type, user_id))
+
 def get_current_user():
     """Get current logged-in user object"""
     if 'user_id' not in session or 'user_type' not in session:
         return None
     
-    user_type = session['user_type']
-    user_id = session['user_id']
-    
-    if user_type == 'admin':
-        return Admin.query.get(user_id)
-    elif user_type == 'event_manager':
-        return EventManager.query.get(user_id)
-    elif user_type == 'participant':
-        return Participant.query.get(user_id)
+    # Memoize per request so the context processor and the route share one lookup
+    key = (session['user_type'], session['user_id'])
+    if g.get('current_user_key') != key:
+        g.current_user = _load_principal(*key)
+        g.current_user_key = key
+    return g.current_user
+
+def find_accounts(email):
+    """Look up an email across all role tables in a single UNION query.
     
-    return None
+    Returns a list of (user_type, user_id, is_active) tuples in login priority
+    order. Each branch of the UNION is served by the table's unique email index.
+    """
+    branches = [
+        select(
+            literal(priority).label('priority'),
+            literal(user_type).label('user_type'),
+            pk.label('user_id'),
+            model.is_active.label('is_active')
+        ).where(model.email == email)
+        for priority, (user_type, model, pk) in enumerate(USER_MODELS)
+    ]
+    lookup = union_all(*branches).subquery()
+    rows = db.session.execute(
+        select(lookup.c.user_type, lookup.c.user_id, lookup.c.is_active).order_by(lookup.c.priority)
+    ).all()
+    return [(row.user_type, row.user_id, row.is_active) for row in rows]
+
+def email_exists(email):
+    """Check whether an email is already used by any admin, event manager or participant"""
+    return len(find_accounts(email)) > 0
+
+def existing_emails(emails):
+    """Lowercased subset of the given emails already used by any account, found with one UNION query.
+
+    Matching ignores case: the MySQL email columns use a case-insensitive
+    collation, so a plain IN keeps the unique indexes usable there; SQLite
+    compares case-sensitively and folds both sides instead.
+    """
+    emails = list({email.lower() for email in emails})
+    if not emails:
+        return set()
+    fold = db.engine.dialect.name == 'sqlite'
+    branches = [
+        select(model.email.label('email')).where((func.lower(model.email) if fold else model.email).in_(emails))
+        for _, model, _ in USER_MODELS
+    ]
+    return {email.lower() for email in db.session.execute(union_all(*branches)).scalars()}
+
+def _rehash_if_outdated(user, user_type, user_id, password):
+    """Upgrade a verified password to the configured hash parameters"""
+    if not hasher.needs_rehash(user.password_hash):
+        return
+    try:
+        user.set_password(password)
+        db.session.commit()
+        invalidate_principal(user_type, user_id)
+    except Exception:
+        # The login itself succeeded; keep the old hash and retry next time
+        db.session.rollback()
 
 def authenticate_user(email, password):
     """Authenticate user across all user types"""
-    # Try admin first
-    admin = Admin.query.filter_by(email=email, is_active=True).first()
-    if admin and admin.check_password(password):
-        return admin, 'admin'
-    
-    # Try event manager
-    event_manager = EventManager.query.filter_by(email=email, is_active=True).first()
-    if event_manager and event_manager.check_password(password):
-        return event_manager, 'event_manager'
+    models = {user_type: model for user_type, model, _ in USER_MODELS}
     
-    # Try participant
-    participant = Participant.query.filter_by(email=email, is_active=True).first()
-    if participant and participant.check_password(password):
-        return participant, 'participant'
+    # One lookup finds the owning table; only matching accounts are loaded
+    for user_type, user_id, is_active in find_accounts(email):
+        if not is_active:
+            continue
+        user = models[user_type].query.get(user_id)
+        if user and user.check_password(password):
+            _rehash_if_outdated(user, user_type, user_id, password)
+            return user, user_type
     
     return None, None
 
@@ -0,0 +1,102 @@
+import click
+from seats import reconcile_seat_counters
+from search import rebuild_person_index, rebuild_event_index
+from dashboard_stats import dashboard_stats
+from imports import import_participants
+from exports import registration_records, ndjson_stream, resume_ndjson
+from templating import template_compilation
+from assets import assets, brotli
+import csv
+import os
+
+def register_commands(app):
+    """Attach maintenance commands to `flask --app app <command>`"""
+
+    @app.cli.command('reconcile-seats')
+    @click.option('--event-id', 'event_ids', type=int, multiple=True, help='Only check these events (repeatable).')
+    def reconcile_seats(event_ids):
+        """Recount registrations and repair drifted event seat counters."""
+        repaired = reconcile_seat_counters(list(event_ids) or None)
+        for event_id, (old_active, old_approved), (new_active, new_approved) in repaired:
+            click.echo(f'Event {event_id}: active {old_active} -> {new_active}, approved {old_approved} -> {new_approved}')
+        click.echo(f'Repaired {len(repaired)} event(s).')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Rebuild the people trigram index and, on SQLite, the event full-text index."""
+        indexed = rebuild_person_index()
+        click.echo(f'Indexed {indexed} participant(s) and event manager(s).')
+        if rebuild_event_index():
+            click.echo('Rebuilt the event full-text index.')
+
+    @app.cli.command('refresh-dashboard-stats')
+    def refresh_dashboard_stats():
+        """Recompute the admin dashboard counters from the base tables."""
+        stats = dashboard_stats.refresh()
+        for key, value in stats.items():
+            if key not in ('refreshed_at', 'age_seconds'):
+                click.echo(f'{key}: {value}')
+
+    @app.cli.command('warm-templates')
+    @click.option('--clear', is_flag=True, help='Drop the bytecode cache first and recompile everything.')
+    def warm_templates(clear):
+        """Compile every template into the bytecode cache and report timings."""
+        if clear:
+            template_compilation.clear()
+            app.jinja_env.cache.clear()
+        timings = template_compilation.warm(app)
+        for name, seconds in timings:
+            click.echo(f'{seconds * 1000:8.1f} ms  {name}')
+        click.echo(f'Warmed {len(timings)} template(s) in {sum(seconds for _, seconds in timings) * 1000:.1f} ms.')
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Minify, fingerprint and precompress the files in static/."""
+        manifest = assets.build(app.static_folder)
+        for source, built in sorted(manifest.items()):
+            path = os.path.join(assets.directory, built)
+            sizes = [f'{os.path.getsize(os.path.join(app.static_folder, source))} B source',
+                     f'{os.path.getsize(path)} B minified']
+            sizes += [f'{os.path.getsize(path + suffix)} B {suffix}' for suffix in ('.gz', '.br')
+                      if os.path.exists(path + suffix)]
+            click.echo(f"{source} -> {built} ({', '.join(sizes)})")
+        if brotli is None:
+            click.echo('brotli is not installed; only .gz variants were written.', err=True)
+
+    @app.cli.command('import-participants')
+    @click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+    @click.option('--batch-size', type=int, default=None, help='Rows per transaction (default IMPORT_BATCH_SIZE).')
+    @click.option('--invites-out', type=click.File('w'), help='Write issued invite tokens to this CSV file.')
+    def import_participants_command(csv_file, batch_size, invites_out):
+        """Create participants from a CSV file (email, first_name, last_name[, password, ...])."""
+        report = import_participants(csv_file, batch_size=batch_size or app.config.get('IMPORT_BATCH_SIZE', 500))
+        for error in report.errors:
+            click.echo(f"Line {error['line']} ({error['email']}): {error['error']}", err=True)
+        if report.error_count > len(report.errors):
+            click.echo(f'... and {report.error_count - len(report.errors)} more error(s)', err=True)
+        if invites_out and report.invites:
+            writer = csv.writer(invites_out)
+            writer.writerow(['email', 'invite_token'])
+            writer.writerows(report.invites)
+        click.echo(f'Imported {report.imported} of {report.rows} row(s), skipped {report.skipped}, '
+                   f'issued {len(report.invites)} invite token(s).')
+
+    @app.cli.command('export-registrations')
+    @click.option('--output', '-o', type=click.Path(dir_okay=False), required=True, help='NDJSON file to write.')
+    @click.option('--since', type=click.DateTime(), help='Only registrations made on or after this date.')
+    @click.option('--until', type=click.DateTime(), help='Only registrations made before this date.')
+    @click.option('--after-id', type=int, default=0, help='Start after this registration id.')
+    @click.option('--resume', is_flag=True, help='Append to --output, continuing after its last exported id.')
+    @click.option('--chunk-size', type=int, default=1000, help='Rows per primary-key chunk.')
+    def export_registrations(output, since, until, after_id, resume, chunk_size):
+        """Export registrations with event, location and status as NDJSON for analytics."""
+        if resume and os.path.exists(output):
+            last = resume_ndjson(output)
+            if last is not None:
+                after_id = max(after_id, last['registration_id'])
+        exported = 0
+        with open(output, 'a' if resume else 'w', encoding='utf-8') as out:
+            for line in ndjson_stream(registration_records(after_id=after_id, since=since, until=until, chunk_size=chunk_size)):
+                out.write(line)
+                exported += 1
+        click.echo(f'Exported {exported} registration(s) after id {after_id} to {output}.')
@@ -0,0 +1,38 @@
+import hashlib
+from flask import request, make_response
+
+def make_etag(*parts):
+    """Strong ETag value from the given validator parts"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def _http_time(value):
+    # HTTP dates have second precision; drop microseconds before comparing
+    return value.replace(microsecond=0) if value is not None else None
+
+def not_modified(etag, last_modified=None):
+    """A 304 response when the request's validators still match, otherwise None.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the client did not send an ETag and a last_modified is given. Pass
+    last_modified only for single resources: on a collection the newest
+    updated_at stays the same when a row is deleted or leaves the page.
+    """
+    if request.if_none_match:
+        matches = request.if_none_match.contains(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matches = _http_time(last_modified) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        return None
+    if not matches:
+        return None
+    response = make_response('', 304)
+    return set_validators(response, etag, last_modified)
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag, Last-Modified and a revalidate-every-time Cache-Control to a response"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _http_time(last_modified)
+    # Responses depend on the logged-in user, so only the client may cache them
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,289 @@
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, update, insert, delete, func, case, event, inspect
+from sqlalchemy.orm import Session, object_session
+from models import db, Admin, EventManager, Participant, Event, Registration, DashboardStat
+from reference_data import reference_data, RELEASED_CATEGORIES
+
+# Counted tables: model -> dashboard_stats key
+COUNTED_MODELS = {
+    Admin: 'total_admins',
+    EventManager: 'total_event_managers',
+    Participant: 'total_participants',
+    Event: 'total_events',
+    Registration: 'total_registrations'
+}
+UPCOMING_KEY = 'upcoming_events'
+STAT_KEYS = tuple(COUNTED_MODELS.values()) + (UPCOMING_KEY,)
+
+# Counter deltas of committed ORM writes waiting to be applied: key -> [delta, earliest upcoming event date]
+_pending_deltas = {}
+_pending_lock = threading.Lock()
+_last_flush = 0.0
+
+def compute_dashboard_stats(now=None):
+    """Count everything from the base tables in one round trip.
+
+    Returns (counts by key, date of the next upcoming event or None).
+    """
+    now = now or datetime.utcnow()
+    columns = [
+        select(func.count()).select_from(model).scalar_subquery().label(key)
+        for model, key in COUNTED_MODELS.items()
+    ]
+    columns.append(select(func.count()).select_from(Event).where(Event.event_date > now).scalar_subquery().label(UPCOMING_KEY))
+    columns.append(select(func.min(Event.event_date)).where(Event.event_date > now).scalar_subquery().label('next_event_at'))
+    row = db.session.execute(select(*columns)).one()._mapping
+    return {key: row[key] for key in STAT_KEYS}, row['next_event_at']
+
+def manager_dashboard_stats(event_manager_id, recent_limit=5):
+    """Dashboard figures for one event manager, aggregated in the database.
+
+    One aggregate over the manager's events gives the total and upcoming
+    counts, one grouped count gives registrations by status, and only the
+    `recent_limit` most recently created events are loaded as objects.
+    """
+    now = datetime.utcnow()
+    total_events, upcoming_events = db.session.execute(
+        select(func.count(), func.coalesce(func.sum(case((Event.event_date > now, 1), else_=0)), 0))
+        .where(Event.event_manager_id == event_manager_id)
+    ).one()
+
+    status_names = reference_data.registration_status_names()
+    registrations_by_status = {
+        status_names.get(status_id, str(status_id)): count
+        for status_id, count in db.session.execute(
+            select(Registration.registration_status_id, func.count())
+            .join(Event, Event.event_id == Registration.event_id)
+            .where(Event.event_manager_id == event_manager_id)
+            .group_by(Registration.registration_status_id)
+        ).all()
+    }
+
+    recent_events = (
+        Event.query.filter_by(event_manager_id=event_manager_id)
+        .order_by(Event.created_at.desc())
+        .limit(recent_limit)
+        .all()
+    )
+    return {
+        'total_events': total_events,
+        'upcoming_events': int(upcoming_events),
+        'total_registrations': sum(registrations_by_status.values()),
+        'registrations_by_status': registrations_by_status,
+        'recent_events': recent_events
+    }
+
+def participant_summary(participant_id):
+    """Registration figures for one participant from a single grouped query.
+
+    Registrations are joined to their events and grouped by status, so the
+    upcoming count never loads an Event per registration.
+    """
+    now = datetime.utcnow()
+    rows = db.session.execute(
+        select(
+            Registration.registration_status_id,
+            func.count(),
+            func.coalesce(func.sum(case((Event.event_date > now, 1), else_=0)), 0)
+        )
+        .join(Event, Event.event_id == Registration.event_id)
+        .where(Registration.participant_id == participant_id)
+        .group_by(Registration.registration_status_id)
+    ).all()
+
+    status_names = reference_data.registration_status_names()
+    released_ids = reference_data.registration_status_ids(*RELEASED_CATEGORIES)
+    return {
+        'my_registrations': sum(count for _, count, _ in rows),
+        'upcoming_registered': sum(int(upcoming) for _, _, upcoming in rows),
+        'active_registrations': sum(count for status_id, count, _ in rows if status_id not in released_ids),
+        'registrations_by_status': {status_names.get(status_id, str(status_id)): count for status_id, count, _ in rows}
+    }
+
+class DashboardStats:
+    """Materialized admin dashboard counters in the dashboard_stats table.
+
+    Inserts and deletes through the ORM are tallied on the session and,
+    once it commits, added to an in-process buffer that is applied in its
+    own short transaction at most every DASHBOARD_STATS_FLUSH_INTERVAL
+    seconds (and before each read). The write transactions themselves never
+    lock a counter row, so concurrent registrations do not queue behind
+    total_registrations. Reading the dashboard is a single query on a
+    handful of rows; deltas still buffered in other processes show up after
+    their next flush, and any drift is wiped out by the periodic refresh. The upcoming events count also goes stale as time
+    passes, so its row carries a valid_until (the start of the next upcoming
+    event). The snapshot is recomputed from the base tables when it is older
+    than DASHBOARD_STATS_MAX_AGE seconds, when valid_until has passed, or on
+    demand with `flask --app app refresh-dashboard-stats`.
+    """
+
+    def __init__(self, app=None):
+        self.max_age = 300
+        self.flush_interval = 2
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_age = app.config.get('DASHBOARD_STATS_MAX_AGE', self.max_age)
+        self.flush_interval = app.config.get('DASHBOARD_STATS_FLUSH_INTERVAL', self.flush_interval)
+        app.extensions['dashboard_stats'] = self
+
+    def refresh(self):
+        """Recompute the snapshot and replace the stored rows; returns the new snapshot"""
+        now = datetime.utcnow()
+        # Buffered deltas belong to committed rows, which the recount includes
+        with _pending_lock:
+            _pending_deltas.clear()
+        counts, next_event_at = compute_dashboard_stats(now)
+        table = DashboardStat.__table__
+        # Separate transaction so the caller's pending changes are not committed
+        with db.engine.begin() as connection:
+            connection.execute(delete(table))
+            connection.execute(insert(table), [
+                {
+                    'stat_key': key,
+                    'stat_value': value,
+                    'valid_until': next_event_at if key == UPCOMING_KEY else None,
+                    'refreshed_at': now
+                }
+                for key, value in counts.items()
+            ])
+        return self._snapshot(counts, now)
+
+    def _snapshot(self, counts, refreshed_at):
+        stats = dict(counts)
+        stats['refreshed_at'] = refreshed_at
+        stats['age_seconds'] = max(0, int((datetime.utcnow() - refreshed_at).total_seconds()))
+        return stats
+
+    def _is_stale(self, rows, now):
+        if set(rows) != set(STAT_KEYS):
+            return True
+        oldest = min(row.refreshed_at for row in rows.values())
+        if self.max_age and (now - oldest).total_seconds() > self.max_age:
+            return True
+        valid_until = rows[UPCOMING_KEY].valid_until
+        return valid_until is not None and now >= valid_until
+
+    def get(self):
+        """Current dashboard counters plus `refreshed_at` and `age_seconds`"""
+        flush_counter_deltas()
+        rows = {row.stat_key: row for row in db.session.execute(select(DashboardStat.__table__)).all()}
+        if self._is_stale(rows, datetime.utcnow()):
+            with self._lock:
+                rows = {row.stat_key: row for row in db.session.execute(select(DashboardStat.__table__)).all()}
+                if self._is_stale(rows, datetime.utcnow()):
+                    return self.refresh()
+        counts = {key: rows[key].stat_value for key in STAT_KEYS}
+        return self._snapshot(counts, min(row.refreshed_at for row in rows.values()))
+
+dashboard_stats = DashboardStats()
+
+def _adjust(connection, key, delta, event_date=None):
+    """Add delta to one counter row; an upcoming event also pulls valid_until forward"""
+    table = DashboardStat.__table__
+    values = {'stat_value': table.c.stat_value + delta}
+    if event_date is not None:
+        values['valid_until'] = case(
+            (table.c.valid_until.is_(None) | (table.c.valid_until > event_date), event_date),
+            else_=table.c.valid_until
+        )
+    connection.execute(update(table).where(table.c.stat_key == key).values(**values))
+
+def count_bulk_insert(connection, model, count):
+    """Adjust a counter for rows inserted with Core statements, which bypass the mapper listeners"""
+    if count:
+        _adjust(connection, COUNTED_MODELS[model], count)
+
+def count_bulk_events(connection, event_dates):
+    """Adjust the event counters for events inserted with Core statements"""
+    count_bulk_insert(connection, Event, len(event_dates))
+    upcoming = [event_date for event_date in event_dates if _is_upcoming(event_date)]
+    if upcoming:
+        _adjust(connection, UPCOMING_KEY, len(upcoming), min(upcoming))
+
+def _is_upcoming(event_date):
+    return event_date is not None and event_date > datetime.utcnow()
+
+def _merge_delta(deltas, key, delta, event_date=None):
+    entry = deltas.setdefault(key, [0, None])
+    entry[0] += delta
+    if event_date is not None and (entry[1] is None or event_date < entry[1]):
+        entry[1] = event_date
+
+def _defer(connection, target, key, delta, event_date=None):
+    """Tally a counter change on the target's session, to be applied after it commits"""
+    session = object_session(target)
+    if session is None:
+        _adjust(connection, key, delta, event_date)
+        return
+    _merge_delta(session.info.setdefault('dashboard_deltas', {}), key, delta, event_date)
+
+def flush_counter_deltas():
+    """Apply the buffered counter deltas of this process in one short transaction"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending_deltas)
+        _pending_deltas.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    try:
+        with db.engine.begin() as connection:
+            for key, (delta, event_date) in pending.items():
+                if delta or event_date is not None:
+                    _adjust(connection, key, delta, event_date)
+    except Exception:
+        # Keep the deltas for the next flush; the periodic refresh corrects anything lost
+        with _pending_lock:
+            for key, (delta, event_date) in pending.items():
+                _merge_delta(_pending_deltas, key, delta, event_date)
+
+@event.listens_for(Session, 'after_commit')
+def _buffer_committed_deltas(session):
+    deltas = session.info.pop('dashboard_deltas', None)
+    if not deltas:
+        return
+    with _pending_lock:
+        for key, (delta, event_date) in deltas.items():
+            _merge_delta(_pending_deltas, key, delta, event_date)
+        due = time.monotonic() - _last_flush >= dashboard_stats.flush_interval
+    if due:
+        flush_counter_deltas()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_deltas(session):
+    session.info.pop('dashboard_deltas', None)
+
+def _register_counter_listeners(model, key):
+    """Keep one dashboard counter in step with ORM inserts and deletes of a model"""
+
+    @event.listens_for(model, 'after_insert')
+    def count_after_insert(mapper, connection, target):
+        _defer(connection, target, key, 1)
+        if model is Event and _is_upcoming(target.event_date):
+            _defer(connection, target, UPCOMING_KEY, 1, target.event_date)
+
+    @event.listens_for(model, 'after_delete')
+    def count_after_delete(mapper, connection, target):
+        _defer(connection, target, key, -1)
+        if model is Event and _is_upcoming(target.event_date):
+            _defer(connection, target, UPCOMING_KEY, -1)
+
+for _model, _key in COUNTED_MODELS.items():
+    _register_counter_listeners(_model, _key)
+
+@event.listens_for(Event, 'after_update')
+def _count_rescheduled_event(mapper, connection, target):
+    history = inspect(target).attrs.event_date.history
+    if not history.has_changes() or not history.deleted:
+        return
+    was_upcoming = _is_upcoming(history.deleted[0])
+    is_upcoming = _is_upcoming(target.event_date)
+    if was_upcoming != is_upcoming:
+        _defer(connection, target, UPCOMING_KEY, 1 if is_upcoming else -1, target.event_date if is_upcoming else None)
+    elif is_upcoming:
+        _defer(connection, target, UPCOMING_KEY, 0, target.event_date)
@@ -0,0 +1,69 @@
+# =============================================================
+# Stand-Up Comedy Event Participation Management System
+# Incremental Schema Migrations (MySQL)
+# 
+# database_schema.sql always describes the current schema for new
+# installs. Existing databases should apply the statements below, in
+# order, for every migration newer than their last applied one.
+# =============================================================
+
+# ---------------------------
+# 1) Registration status categories
+# ---------------------------
+# NULL categories are derived from status_name and stored on first use.
+ALTER TABLE registration_status ADD COLUMN category VARCHAR(20) NULL;
+
+# ---------------------------
+# 2) Denormalized seat counters on event
+# ---------------------------
+# Run `flask --app app reconcile-seats` afterwards to fill in the counts.
+ALTER TABLE event
+  ADD COLUMN active_registration_count INT NOT NULL DEFAULT 0,
+  ADD COLUMN approved_count INT NOT NULL DEFAULT 0;
+
+# ---------------------------
+# 3) Full-text event search
+# ---------------------------
+CREATE FULLTEXT INDEX ft_event_search ON event(event_name, event_description, location);
+
+# ---------------------------
+# 4) Trigram index for admin people search
+# ---------------------------
+# Run `flask --app app rebuild-search-index` afterwards to index existing people.
+CREATE TABLE IF NOT EXISTS search_trigram (
+  entity_type VARCHAR(20) NOT NULL,
+  trigram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  entity_id INT NOT NULL,
+  PRIMARY KEY (entity_type, trigram, entity_id),
+  INDEX idx_trigram_entity (entity_type, entity_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+# ---------------------------
+# 5) Composite indexes for keyset pagination
+# ---------------------------
+CREATE INDEX idx_event_date_id ON event(event_date, event_id);
+CREATE INDEX idx_event_manager_date_id ON event(event_manager_id, event_date, event_id);
+CREATE INDEX idx_event_manager_created_id ON event_manager(created_at, event_manager_id);
+CREATE INDEX idx_participant_created_id ON participant(created_at, participant_id);
+
+# ---------------------------
+# 6) Materialized admin dashboard counters
+# ---------------------------
+# Filled on first dashboard load, or run `flask --app app refresh-dashboard-stats`.
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+  stat_key VARCHAR(50) NOT NULL PRIMARY KEY,
+  stat_value BIGINT NOT NULL DEFAULT 0,
+  valid_until DATETIME NULL,
+  refreshed_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+# ---------------------------
+# 7) Non-null creation times for keyset pagination
+# ---------------------------
+# Rows with a NULL created_at would never match the (created_at, id) cursor
+# predicate; backfill them with the epoch so they sort last in the
+# newest-first listings.
+UPDATE event_manager SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL;
+UPDATE participant SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL;
+ALTER TABLE event_manager MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE participant MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
@@ -19,6 +19,8 @@
 # ---------------------------
 # 1) Drop tables (children first)
 # ---------------------------
+DROP TABLE IF EXISTS dashboard_stats;
+DROP TABLE IF EXISTS search_trigram;
 DROP TABLE IF EXISTS registration;
 DROP TABLE IF EXISTS event;
 DROP TABLE IF EXISTS event_manager;
@@ -53,6 +55,7 @@ CREATE TABLE IF NOT EXISTS registration_status (
   registration_status_id INT AUTO_INCREMENT PRIMARY KEY,
   status_name VARCHAR(60) NOT NULL,
   status_description VARCHAR(255),
+  category VARCHAR(20),
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -79,7 +82,7 @@ CREATE TABLE IF NOT EXISTS event_manager (
   first_name VARCHAR(80) NOT NULL,
   last_name VARCHAR(80) NOT NULL,
   phone_number VARCHAR(30),
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   is_active BOOLEAN DEFAULT TRUE,
   CONSTRAINT fk_em_admin FOREIGN KEY (created_by_admin_id)
     REFERENCES admin(admin_id)
@@ -98,7 +101,7 @@ CREATE TABLE IF NOT EXISTS participant (
   city VARCHAR(80),
   state VARCHAR(60),
   country VARCHAR(60),
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   is_active BOOLEAN DEFAULT TRUE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -120,6 +123,8 @@ CREATE TABLE IF NOT EXISTS event (
   registration_deadline DATETIME,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  active_registration_count INT NOT NULL DEFAULT 0,
+  approved_count INT NOT NULL DEFAULT 0,
   CONSTRAINT fk_event_manager FOREIGN KEY (event_manager_id)
     REFERENCES event_manager(event_manager_id)
     ON DELETE RESTRICT ON UPDATE CASCADE,
@@ -155,6 +160,23 @@ CREATE TABLE IF NOT EXISTS registration (
     ON DELETE SET NULL ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+# Trigram index for admin people search (maintained by the application)
+CREATE TABLE IF NOT EXISTS search_trigram (
+  entity_type VARCHAR(20) NOT NULL,
+  trigram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  entity_id INT NOT NULL,
+  PRIMARY KEY (entity_type, trigram, entity_id),
+  INDEX idx_trigram_entity (entity_type, entity_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+# Materialized admin dashboard counters (maintained by the application)
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+  stat_key VARCHAR(50) NOT NULL PRIMARY KEY,
+  stat_value BIGINT NOT NULL DEFAULT 0,
+  valid_until DATETIME NULL,
+  refreshed_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 # ---------------------------
 # 4) Indexes and additional constraints
 # ---------------------------
@@ -166,6 +188,11 @@ CREATE INDEX idx_event_type ON event(event_type_id);
 CREATE INDEX idx_reg_event ON registration(event_id);
 CREATE INDEX idx_reg_participant ON registration(participant_id);
 CREATE INDEX idx_reg_status ON registration(registration_status_id);
+CREATE FULLTEXT INDEX ft_event_search ON event(event_name, event_description, location);
+CREATE INDEX idx_event_date_id ON event(event_date, event_id);
+CREATE INDEX idx_event_manager_date_id ON event(event_manager_id, event_date, event_id);
+CREATE INDEX idx_event_manager_created_id ON event_manager(created_at, event_manager_id);
+CREATE INDEX idx_participant_created_id ON participant(created_at, participant_id);
 
 # ---------------------------
 # 5) Insert reference data and default admin user
@@ -188,13 +215,14 @@ INSERT INTO event_status (status_name, status_description) VALUES
 ('Cancelled', 'Event cancelled');
 
 # Insert basic registration statuses
-INSERT INTO registration_status (status_name, status_description) VALUES
-('Pending', 'Awaiting manager confirmation'),
-('Confirmed', 'Confirmed by event manager'),
-('Rejected', 'Rejected by event manager'),
-('Cancelled', 'Cancelled by participant'),
-('Waitlisted', 'Placed on waitlist'),
-('NoShow', 'Participant did not attend');
+# category: pending, approved, rejected, cancelled or other (rejected/cancelled release the spot)
+INSERT INTO registration_status (status_name, status_description, category) VALUES
+('Pending', 'Awaiting manager confirmation', 'pending'),
+('Confirmed', 'Confirmed by event manager', 'approved'),
+('Rejected', 'Rejected by event manager', 'rejected'),
+('Cancelled', 'Cancelled by participant', 'cancelled'),
+('Waitlisted', 'Placed on waitlist', 'other'),
+('NoShow', 'Participant did not attend', 'other');
 
 # Insert default admin user
 # Email: admin@comedyorg.com
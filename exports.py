@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from models import db, Event, Participant, Registration
+from reference_data import reference_data
+
+ATTENDEE_HEADER = ('event_id', 'event_name', 'event_date', 'registration_id', 'first_name', 'last_name', 'email',
+                   'phone_number', 'registration_status', 'registered_at', 'additional_info')
+
+def attendee_rows(event_id=None, status_ids=None, event_manager_id=None, batch_size=1000):
+    """Yield attendee tuples (ATTENDEE_HEADER order) straight from a server-side cursor.
+
+    Only plain column values are fetched, batch_size rows at a time, so
+    memory stays flat however many registrations there are.
+    """
+    query = (
+        select(Event.event_id, Event.event_name, Event.event_date, Registration.registration_id,
+               Participant.first_name, Participant.last_name, Participant.email, Participant.phone_number,
+               Registration.registration_status_id, Registration.registered_at, Registration.additional_info)
+        .join(Registration, Registration.event_id == Event.event_id)
+        .join(Participant, Participant.participant_id == Registration.participant_id)
+        .order_by(Event.event_date, Event.event_id, Participant.last_name, Participant.first_name, Registration.registration_id)
+        .execution_options(yield_per=batch_size)
+    )
+    if event_id is not None:
+        query = query.where(Event.event_id == event_id)
+    if event_manager_id is not None:
+        query = query.where(Event.event_manager_id == event_manager_id)
+    if status_ids is not None:
+        query = query.where(Registration.registration_status_id.in_(status_ids))
+
+    status_names = reference_data.registration_status_names()
+    for row in db.session.execute(query):
+        row = list(row)
+        row[8] = status_names.get(row[8], row[8])
+        yield row
+
+def csv_stream(header, rows, flush_every=500):
+    """Encode rows as CSV text, yielding a chunk every flush_every rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(['' if value is None else value.isoformat() if hasattr(value, 'isoformat') else value
+                         for value in row])
+        if count % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def registration_records(after_id=0, since=None, until=None, chunk_size=1000):
+    """Yield registrations joined with event, participant location and status as dicts, in id order.
+
+    Rows are read in primary-key chunks (registration_id > last seen id), and
+    each chunk runs in its own short read transaction, so a long export
+    never pins a snapshot on the database. Pass the last registration_id
+    received as `after_id` to resume. `since`/`until` filter on registered_at
+    (inclusive start, exclusive end).
+    """
+    status_names = reference_data.registration_status_names()
+    status_categories = {s.registration_status_id: s.category for s in reference_data.registration_statuses()}
+    query = (
+        select(Registration.registration_id, Registration.registered_at, Registration.status_updated_at,
+               Registration.registration_status_id, Registration.additional_info,
+               Event.event_id, Event.event_name, Event.event_date, Event.location, Event.event_type_id,
+               Participant.participant_id, Participant.city, Participant.state, Participant.country)
+        .join(Event, Event.event_id == Registration.event_id)
+        .join(Participant, Participant.participant_id == Registration.participant_id)
+        .order_by(Registration.registration_id)
+        .limit(chunk_size)
+    )
+    if since is not None:
+        query = query.where(Registration.registered_at >= since)
+    if until is not None:
+        query = query.where(Registration.registered_at < until)
+
+    last_id = after_id or 0
+    while True:
+        try:
+            chunk = db.session.execute(query.where(Registration.registration_id > last_id)).all()
+        finally:
+            # End the read transaction between chunks
+            db.session.rollback()
+        for row in chunk:
+            record = dict(row._mapping)
+            record['registration_status'] = status_names.get(row.registration_status_id)
+            record['registration_status_category'] = status_categories.get(row.registration_status_id)
+            yield record
+        if len(chunk) < chunk_size:
+            break
+        last_id = chunk[-1].registration_id
+
+def ndjson_stream(records):
+    """Encode records as newline-delimited JSON, one line per record"""
+    for record in records:
+        yield json.dumps(record, default=_json_default) + '\n'
+
+def resume_ndjson(path, block_size=65536):
+    """Prepare an interrupted NDJSON export for appending; returns its last complete record, or None.
+
+    The file is read backwards from the end in blocks, so only the tail is
+    loaded however large the export is. A partial last line (a run stopped
+    mid-write) is truncated away.
+    """
+    with open(path, 'r+b') as export:
+        position = export.seek(0, 2)
+        tail = b''
+        while True:
+            last_newline = tail.rfind(b'\n')
+            # Done once the tail holds the last newline and the start of the line it ends
+            if position == 0 or (last_newline != -1 and tail.rfind(b'\n', 0, last_newline) != -1):
+                break
+            step = min(block_size, position)
+            position -= step
+            export.seek(position)
+            tail = export.read(step) + tail
+        export.truncate(position + last_newline + 1)
+        if last_newline == -1:
+            return None
+        line = tail[tail.rfind(b'\n', 0, last_newline) + 1:last_newline]
+        return json.loads(line) if line.strip() else None
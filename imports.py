@@ -0,0 +1,172 @@
+import csv
+import re
+import secrets
+import tempfile
+from sqlalchemy import insert, select
+from models import db, Participant
+from auth import existing_emails
+from passwords import hasher
+from search import index_people
+from dashboard_stats import count_bulk_insert
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+REQUIRED_COLUMNS = ('email', 'first_name', 'last_name')
+OPTIONAL_COLUMNS = ('password', 'phone_number', 'city', 'state', 'country')
+# Column lengths from the participant table
+MAX_LENGTHS = {'email': 150, 'first_name': 80, 'last_name': 80, 'phone_number': 30, 'city': 80, 'state': 60, 'country': 60}
+MIN_PASSWORD_LENGTH = 6
+# Uploads are held in memory up to this size while they are counted, then on disk
+SPOOL_MEMORY_LIMIT = 8 * 1024 * 1024
+
+class ImportReport:
+    """Outcome of a participant import: counts, per-row errors and issued invite tokens"""
+
+    def __init__(self, max_errors=1000):
+        self.rows = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+        self.invites = []
+        self._max_errors = max_errors
+
+    def add_error(self, line, email, message):
+        self.error_count += 1
+        self.skipped += 1
+        if len(self.errors) < self._max_errors:
+            self.errors.append({'line': line, 'email': email, 'error': message})
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'invites_issued': len(self.invites)
+        }
+
+def _clean_row(row):
+    """Strip values and validate one CSV row; returns (values, error message)"""
+    values = {column: (row.get(column) or '').strip() for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+    values['email'] = values['email'].lower()
+    for column in REQUIRED_COLUMNS:
+        if not values[column]:
+            return None, f'Missing {column}'
+    if not EMAIL_PATTERN.match(values['email']):
+        return None, 'Invalid email address'
+    for column, limit in MAX_LENGTHS.items():
+        if len(values[column]) > limit:
+            return None, f'{column} is longer than {limit} characters'
+    if values['password'] and len(values['password']) < MIN_PASSWORD_LENGTH:
+        return None, f'Password must be at least {MIN_PASSWORD_LENGTH} characters long'
+    return values, None
+
+def _insert_batch(batch, report):
+    """Deduplicate a batch against the database, hash passwords and insert it in one transaction"""
+    taken = existing_emails(values['email'] for _, values in batch)
+    fresh = []
+    for line, values in batch:
+        if values['email'] in taken:
+            report.add_error(line, values['email'], 'Email already registered')
+        else:
+            fresh.append((line, values))
+    if not fresh:
+        return
+
+    # Rows without a password get a random invite token, which works as the initial password
+    invites = {}
+    for line, values in fresh:
+        if not values['password']:
+            invites[values['email']] = values['password'] = secrets.token_urlsafe(16)
+    hashes = hasher.hash_many(values['password'] for _, values in fresh)
+
+    rows = [
+        {
+            'email': values['email'],
+            'password_hash': password_hash,
+            'first_name': values['first_name'],
+            'last_name': values['last_name'],
+            'phone_number': values['phone_number'] or None,
+            'city': values['city'] or None,
+            'state': values['state'] or None,
+            'country': values['country'] or None
+        }
+        for (_, values), password_hash in zip(fresh, hashes)
+    ]
+    try:
+        connection = db.session.connection()
+        connection.execute(insert(Participant), rows)
+        # Core inserts skip the ORM listeners, so index and count the new people here
+        created = connection.execute(
+            select(Participant.participant_id, Participant.email, Participant.first_name, Participant.last_name)
+            .where(Participant.email.in_([row['email'] for row in rows]))
+        ).all()
+        index_people(connection, 'participant', [(person.participant_id, person) for person in created], replace=False)
+        count_bulk_insert(connection, Participant, len(created))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for line, values in fresh:
+            report.add_error(line, values['email'], f'Batch insert failed: {e}')
+        return
+    report.imported += len(rows)
+    report.invites.extend(invites.items())
+
+def import_participants(stream, batch_size=500, max_errors=1000):
+    """Create participants from a CSV text stream, batch_size rows per transaction.
+
+    The file needs email, first_name and last_name columns; password,
+    phone_number, city, state and country are optional. Rows are read
+    lazily, so memory stays bounded by the batch size (plus the set of
+    emails seen, used to skip duplicates within the file). Each batch is
+    checked against existing accounts with one query, hashed in the password
+    worker pool and inserted with one multi-row INSERT. Rows without a
+    password get an invite token, returned in report.invites.
+    """
+    report = ImportReport(max_errors=max_errors)
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        report.add_error(1, None, f"Missing column(s): {', '.join(missing)}")
+        report.skipped = 0
+        return report
+
+    seen = set()
+    batch = []
+    for row in reader:
+        report.rows += 1
+        line = reader.line_num
+        values, error = _clean_row(row)
+        if error:
+            report.add_error(line, (row.get('email') or '').strip() or None, error)
+            continue
+        if values['email'] in seen:
+            report.add_error(line, values['email'], 'Duplicate email in file')
+            continue
+        seen.add(values['email'])
+        batch.append((line, values))
+        if len(batch) >= batch_size:
+            _insert_batch(batch, report)
+            batch = []
+    if batch:
+        _insert_batch(batch, report)
+    return report
+
+def spool_csv(stream, max_rows):
+    """Copy a CSV text stream to a temporary file and rewind it.
+
+    Returns None, without reading further, as soon as the stream turns out
+    to hold more than max_rows data rows, so an oversized upload can be
+    refused before anything is hashed or inserted.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT, mode='w+', encoding='utf-8', newline='')
+    writer = csv.writer(spooled)
+    for index, row in enumerate(csv.reader(stream)):
+        # Index 0 is the header row
+        if index > max_rows:
+            spooled.close()
+            return None
+        writer.writerow(row)
+    spooled.seek(0)
+    return spooled
@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r'\s+')
+# A run of bind placeholders, e.g. an expanded IN (...) list
+_PLACEHOLDER_LIST = re.compile(r'(?:%s|\?|:\w+)(?:\s*,\s*(?:%s|\?|:\w+))+')
+
+def statement_shape(statement):
+    """Normalize a SQL statement so executions differing only in IN-list length compare equal"""
+    return _PLACEHOLDER_LIST.sub('?, ...', _WHITESPACE.sub(' ', statement).strip())
+
+class RequestQueryStats:
+    """Queries issued while handling one request"""
+
+    def __init__(self, slowest_limit):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.slowest = []
+        self._slowest_limit = slowest_limit
+
+    def record(self, statement, duration):
+        shape = statement_shape(statement)
+        self.count += 1
+        self.total_time += duration
+        self.shapes[shape] += 1
+        if self._slowest_limit:
+            self.slowest.append((duration, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self._slowest_limit:]
+
+    def n_plus_one_suspects(self, threshold):
+        """(shape, executions) for statements repeated at least `threshold` times"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+class QueryInstrumentation:
+    """Per-request SQL query counting with N+1 detection.
+
+    Enabled with SQL_INSTRUMENTATION; when off no SQLAlchemy listeners are
+    installed, so there is no per-query cost at all. When on, every request
+    records its query count, DB time and slowest statements. Statement
+    shapes executed SQL_N_PLUS_ONE_THRESHOLD or more times in one request are
+    logged as N+1 suspects. In debug mode (or with SQL_INSTRUMENTATION_HEADERS)
+    the figures are returned as X-SQL-* response headers, and aggregates per
+    endpoint are available from snapshot() (served at /api/metrics).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.headers = None
+        self.n_plus_one_threshold = 5
+        self.slowest_limit = 5
+        self._endpoints = {}
+        self._slowest = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_INSTRUMENTATION', False)
+        self.headers = app.config.get('SQL_INSTRUMENTATION_HEADERS')
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+        self.slowest_limit = app.config.get('SQL_SLOWEST_STATEMENTS', self.slowest_limit)
+        app.extensions['sql_instrumentation'] = self
+        if not self.enabled:
+            return
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        @app.before_request
+        def start_query_stats():
+            g.sql_stats = RequestQueryStats(self.slowest_limit)
+
+        @app.after_request
+        def finish_query_stats(response):
+            stats = g.pop('sql_stats', None)
+            if stats is None:
+                return response
+            suspects = stats.n_plus_one_suspects(self.n_plus_one_threshold)
+            endpoint = request.endpoint or request.path
+            self._record(endpoint, stats, suspects)
+            if suspects:
+                app.logger.warning('Possible N+1 in %s: %s', endpoint,
+                                   '; '.join(f'{count}x {shape[:120]}' for shape, count in suspects))
+            if self.headers or (self.headers is None and app.debug):
+                response.headers['X-SQL-Query-Count'] = str(stats.count)
+                response.headers['X-SQL-Time-Ms'] = f'{stats.total_time * 1000:.1f}'
+                if suspects:
+                    response.headers['X-SQL-N-Plus-One'] = ' | '.join(
+                        f'{count}x {shape[:80]}' for shape, count in suspects[:3]
+                    )
+            return response
+
+    def _record(self, endpoint, stats, suspects):
+        with self._lock:
+            totals = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'db_time': 0.0,
+                'n_plus_one_requests': 0, 'suspects': Counter()
+            })
+            totals['requests'] += 1
+            totals['queries'] += stats.count
+            totals['max_queries'] = max(totals['max_queries'], stats.count)
+            totals['db_time'] += stats.total_time
+            if suspects:
+                totals['n_plus_one_requests'] += 1
+                for shape, _ in suspects:
+                    totals['suspects'][shape] += 1
+            if self.slowest_limit:
+                self._slowest.extend((duration, shape, endpoint) for duration, shape in stats.slowest)
+                self._slowest.sort(key=lambda item: item[0], reverse=True)
+                del self._slowest[self.slowest_limit:]
+
+    def snapshot(self):
+        """Aggregated figures per endpoint since start-up (or the last reset())"""
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    'requests': totals['requests'],
+                    'queries': totals['queries'],
+                    'avg_queries': round(totals['queries'] / totals['requests'], 1),
+                    'max_queries': totals['max_queries'],
+                    'db_time_ms': round(totals['db_time'] * 1000, 1),
+                    'avg_db_time_ms': round(totals['db_time'] * 1000 / totals['requests'], 2),
+                    'n_plus_one_requests': totals['n_plus_one_requests'],
+                    'n_plus_one_suspects': [shape for shape, _ in totals['suspects'].most_common(3)]
+                }
+                for endpoint, totals in self._endpoints.items()
+            }
+            slowest = [
+                {'duration_ms': round(duration * 1000, 2), 'statement': shape, 'endpoint': endpoint}
+                for duration, shape, endpoint in self._slowest
+            ]
+        return {'enabled': self.enabled, 'endpoints': endpoints, 'slowest_statements': slowest}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slowest.clear()
+
+instrumentation = QueryInstrumentation()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # The start time lives on the statement's own execution context, so a statement that
+    # raises (and never reaches after_cursor_execute) leaves nothing behind on the connection
+    if context is not None and has_request_context() and 'sql_stats' in g:
+        context._sql_query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_sql_query_start', None)
+    if started is None or not has_request_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
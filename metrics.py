@@ -0,0 +1,201 @@
+import threading
+import time
+from flask import Response, g, request, abort
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from models import db
+from passwords import hasher
+
+# Latency buckets in seconds, from cache hits up to slow scrypt-bound requests
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Base for labelled metrics; each keeps its own lock so recording never contends across metrics"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        return tuple(zip(self.labelnames, key)) + tuple(extra)
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return lines
+
+    def _samples(self, items):
+        return [f'{self.name}{_format_labels(self._labels(key))} {_format_value(value)}' for key, value in items]
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, items):
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_format_labels(self._labels(key, [("le", repr(bound))]))} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self._labels(key, [("le", "+Inf")]))} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self._labels(key))} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self._labels(key))} {count}')
+        return lines
+
+REQUESTS = Counter('pms_http_requests_total', 'HTTP requests by endpoint, method and status code.',
+                   ('endpoint', 'method', 'status'))
+REQUEST_LATENCY = Histogram('pms_http_request_duration_seconds', 'HTTP request latency by endpoint and method.',
+                            ('endpoint', 'method'))
+IN_FLIGHT = Gauge('pms_http_requests_in_flight', 'Requests currently being handled, by endpoint.', ('endpoint',))
+POOL_CHECKOUT_WAIT = Histogram('pms_db_pool_checkout_seconds', 'Time spent waiting for a database connection from the pool.',
+                               buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0))
+POOL_CHECKED_OUT = Gauge('pms_db_pool_checked_out', 'Database connections currently checked out of the pool.')
+PASSWORD_HASHING = Histogram('pms_password_hash_seconds', 'Password hashing and verification time by operation.',
+                             ('operation',), buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+
+REGISTRY = (REQUESTS, REQUEST_LATENCY, IN_FLIGHT, POOL_CHECKOUT_WAIT, POOL_CHECKED_OUT, PASSWORD_HASHING)
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+def render_metrics():
+    """All registered metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+class Metrics:
+    """Prometheus metrics for request latency, throughput, the DB pool and password hashing.
+
+    Must be initialised before `db.init_app(app)` so the engine is created
+    with TimedQueuePool. Metrics are served at /metrics; set METRICS_TOKEN to
+    require `Authorization: Bearer <token>` from the scraper.
+    """
+
+    def __init__(self, app=None):
+        self.token = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.token = app.config.get('METRICS_TOKEN')
+        app.extensions['metrics'] = self
+        self._install_pool(app)
+
+        if _observe_password_hashing not in hasher.observers:
+            hasher.observers.append(_observe_password_hashing)
+
+        @app.before_request
+        def start_request_timer():
+            g.metrics_started = time.perf_counter()
+            g.metrics_endpoint = request.endpoint or 'unmatched'
+            IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+        @app.after_request
+        def capture_status(response):
+            g.metrics_status = response.status_code
+            return response
+
+        @app.teardown_request
+        def observe_request(exc):
+            started = g.pop('metrics_started', None)
+            if started is None:
+                return
+            endpoint = g.pop('metrics_endpoint')
+            status = 500 if exc is not None else g.pop('metrics_status', 500)
+            IN_FLIGHT.dec(endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, method=request.method, status=status)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def _install_pool(self, app):
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+        url = make_url(app.config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://')
+        # In-memory SQLite needs its single shared connection pool
+        if 'poolclass' in options or (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+            return
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, 'poolclass': TimedQueuePool}
+
+    def metrics_view(self):
+        if self.token and request.headers.get('Authorization') != f'Bearer {self.token}':
+            abort(401)
+        pool = db.engine.pool
+        if hasattr(pool, 'checkedout'):
+            POOL_CHECKED_OUT.set(pool.checkedout())
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def _observe_password_hashing(operation, seconds):
+    PASSWORD_HASHING.observe(seconds, operation=operation)
+
+metrics = Metrics()
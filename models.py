@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import mysql
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hasher
 
 db = SQLAlchemy()
 
@@ -21,18 +22,11 @@ class Admin(db.Model):
     created_event_managers = db.relationship('EventManager', backref='created_by_admin', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
-        # Handle both new Werkzeug hashes and old placeholder hashes
-        if not self.password_hash or self.password_hash.startswith('$2y$10$hash'):
-            # This is a placeholder hash, treat as invalid
-            return False
-        try:
-            return check_password_hash(self.password_hash, password)
-        except ValueError:
-            # Invalid hash format, treat as invalid
-            return False
+        # Placeholder and malformed hashes are treated as invalid by the hasher
+        return hasher.verify(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -48,6 +42,9 @@ class Admin(db.Model):
 
 class EventManager(db.Model):
     __tablename__ = 'event_manager'
+    __table_args__ = (
+        db.Index('idx_event_manager_created_id', 'created_at', 'event_manager_id'),
+    )
     
     event_manager_id = db.Column(db.Integer, primary_key=True)
     created_by_admin_id = db.Column(db.Integer, db.ForeignKey('admin.admin_id'), nullable=False)
@@ -57,7 +54,7 @@ class EventManager(db.Model):
     first_name = db.Column(db.String(80), nullable=False)
     last_name = db.Column(db.String(80), nullable=False)
     phone_number = db.Column(db.String(30))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
@@ -65,18 +62,11 @@ class EventManager(db.Model):
     updated_registrations = db.relationship('Registration', backref='updated_by_event_manager', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
-        # Handle both new Werkzeug hashes and old placeholder hashes
-        if not self.password_hash or self.password_hash.startswith('$2y$10$hash'):
-            # This is a placeholder hash, treat as invalid
-            return False
-        try:
-            return check_password_hash(self.password_hash, password)
-        except ValueError:
-            # Invalid hash format, treat as invalid
-            return False
+        # Placeholder and malformed hashes are treated as invalid by the hasher
+        return hasher.verify(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -93,6 +83,9 @@ class EventManager(db.Model):
 
 class Participant(db.Model):
     __tablename__ = 'participant'
+    __table_args__ = (
+        db.Index('idx_participant_created_id', 'created_at', 'participant_id'),
+    )
     
     participant_id = db.Column(db.Integer, primary_key=True)
     role = db.Column(db.String(60), default='attendee')
@@ -104,25 +97,18 @@ class Participant(db.Model):
     city = db.Column(db.String(80))
     state = db.Column(db.String(60))
     country = db.Column(db.String(60))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
     registrations = db.relationship('Registration', backref='participant', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
-        # Handle both new Werkzeug hashes and old placeholder hashes
-        if not self.password_hash or self.password_hash.startswith('$2y$10$hash'):
-            # This is a placeholder hash, treat as invalid
-            return False
-        try:
-            return check_password_hash(self.password_hash, password)
-        except ValueError:
-            # Invalid hash format, treat as invalid
-            return False
+        # Placeholder and malformed hashes are treated as invalid by the hasher
+        return hasher.verify(self.password_hash, password)
     
     def to_dict(self):
         return {
@@ -167,6 +153,7 @@ class RegistrationStatus(db.Model):
     registration_status_id = db.Column(db.Integer, primary_key=True)
     status_name = db.Column(db.String(60), nullable=False)
     status_description = db.Column(db.String(255))
+    category = db.Column(db.String(20))  # pending, approved, rejected, cancelled or other
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -174,6 +161,13 @@ class RegistrationStatus(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'event'
+    __table_args__ = (
+        # Full-text search on MySQL; SQLite uses the FTS5 table managed by search.py
+        db.Index('ft_event_search', 'event_name', 'event_description', 'location', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Keyset pagination by (event_date, event_id), overall and per event manager
+        db.Index('idx_event_date_id', 'event_date', 'event_id'),
+        db.Index('idx_event_manager_date_id', 'event_manager_id', 'event_date', 'event_id'),
+    )
     
     event_id = db.Column(db.Integer, primary_key=True)
     event_manager_id = db.Column(db.Integer, db.ForeignKey('event_manager.event_manager_id'), nullable=False)
@@ -187,6 +181,9 @@ class Event(db.Model):
     registration_deadline = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Maintained by seats.py whenever a registration is created or changes status
+    active_registration_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    approved_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     registrations = db.relationship('Registration', backref='event', lazy=True)
@@ -230,3 +227,24 @@ class Registration(db.Model):
             'status_updated_at': self.status_updated_at.isoformat() if self.status_updated_at else None,
             'updated_by_event_manager_id': self.updated_by_event_manager_id
         }
+
+class SearchTrigram(db.Model):
+    __tablename__ = 'search_trigram'
+    
+    # Trigrams of the lowercased email, first and last name of participants and event managers
+    entity_type = db.Column(db.String(20), primary_key=True)
+    trigram = db.Column(db.String(3).with_variant(mysql.VARCHAR(3, charset='utf8mb4', collation='utf8mb4_bin'), 'mysql'), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    
+    __table_args__ = (
+        db.Index('idx_trigram_entity', 'entity_type', 'entity_id'),
+    )
+
+class DashboardStat(db.Model):
+    __tablename__ = 'dashboard_stats'
+    
+    # Materialized admin dashboard counters, adjusted on writes and recomputed periodically
+    stat_key = db.Column(db.String(50), primary_key=True)
+    stat_value = db.Column(db.BigInteger, nullable=False, default=0)
+    valid_until = db.Column(db.DateTime)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
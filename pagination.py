@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, text, DateTime
+from models import db
+
+class KeysetPagination:
+    """One page of a keyset (cursor) paginated query.
+
+    Mirrors the attributes templates use from Flask-SQLAlchemy's Pagination
+    where they make sense (items, per_page, has_next, total), plus the
+    opaque cursor for the following page. There are no page numbers.
+    """
+
+    keyset = True
+
+    def __init__(self, items, per_page, cursor, next_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque URL-safe token"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into typed sort key values; None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            return None
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for column, value in zip(columns, payload)
+        ]
+    except (ValueError, TypeError):
+        return None
+
+def attach_next_cursor(pagination, columns):
+    """Give a page-number Pagination the cursor of its last row as `next_cursor`.
+
+    The query must be ordered by `columns` the way keyset_paginate orders
+    them; a "next" link carrying the cursor then continues in keyset mode
+    instead of asking for an ever deeper OFFSET.
+    """
+    pagination.next_cursor = None
+    if pagination.has_next and pagination.items:
+        last = pagination.items[-1]
+        pagination.next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return pagination
+
+def approximate_row_count(table_name):
+    """Table row estimate from MySQL statistics, or None on other databases"""
+    if db.engine.dialect.name != 'mysql':
+        return None
+    return db.session.execute(
+        text('SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name'),
+        {'name': table_name}
+    ).scalar()
+
+def keyset_paginate(query, columns, cursor=None, per_page=10, descending=False, total=None, approx_table=None):
+    """Fetch the page after `cursor` for a query ordered by `columns`.
+
+    `columns` must be non-null and, taken together, unique (end with the
+    primary key), and should be backed by a composite index so every page is
+    an index range scan no matter how deep. `total` may be None (no count),
+    'exact' (COUNT(*)) or 'approx' (table statistics when `approx_table`
+    names an unfiltered table on MySQL, otherwise exact).
+    """
+    if per_page < 1:
+        raise ValueError('per_page must be at least 1')
+    ordered = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    after = decode_cursor(cursor, columns)
+    if after is not None:
+        # (a, b) > (x, y) expanded as a > x OR (a = x AND b > y) so each branch can use the index
+        branches = []
+        for i, column in enumerate(columns):
+            equal = [columns[j] == after[j] for j in range(i)]
+            beyond = column < after[i] if descending else column > after[i]
+            branches.append(and_(*equal, beyond))
+        ordered = ordered.filter(or_(*branches))
+
+    rows = ordered.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    count = None
+    if total == 'approx' and approx_table:
+        count = approximate_row_count(approx_table)
+    if total in ('exact', 'approx') and count is None:
+        count = query.order_by(None).count()
+
+    return KeysetPagination(items, per_page, cursor if after is not None else None, next_cursor, count)
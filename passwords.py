@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Seed data used this prefix before real hashes were set; it never verifies
+PLACEHOLDER_HASH_PREFIX = '$2y$10$hash'
+
+def _verify(pwhash, password):
+    """Check a password against a hash (runs inside the worker pool)"""
+    try:
+        return check_password_hash(pwhash, password)
+    except ValueError:
+        # Invalid hash format, treat as invalid
+        return False
+
+class PasswordHasher:
+    """Password hashing service that keeps scrypt off the request thread.
+
+    Hashing and verification run in a bounded process pool when
+    PASSWORD_HASH_WORKERS is greater than zero, otherwise inline. The hash
+    method (e.g. 'scrypt:32768:8:1') comes from PASSWORD_HASH_METHOD so the
+    cost can be tuned per deployment; hashes made with other parameters are
+    reported by needs_rehash() and upgraded on the next successful login.
+    """
+
+    def __init__(self, app=None):
+        self.method = 'scrypt:32768:8:1'
+        self.salt_length = 16
+        self.workers = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._method_prefix = None
+        # Callables taking (operation, seconds), e.g. the metrics recorder
+        self.observers = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self._method_prefix = None
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', self.salt_length)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                # Bound the backlog so a login storm queues on the request threads, not in memory
+                self._slots = threading.BoundedSemaphore(self.workers * 2)
+            return self._executor
+
+    def _run(self, operation, func, *args):
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return func(*args)
+            with self._slots:
+                return executor.submit(func, *args).result()
+        finally:
+            self._record(operation, time.perf_counter() - started)
+
+    def _record(self, operation, seconds):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            stats['count'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        for observer in self.observers:
+            observer(operation, seconds)
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run('hash', generate_password_hash, password, self.method, self.salt_length)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords, spread across the worker pool when there is one"""
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            hash_one = partial(generate_password_hash, method=self.method, salt_length=self.salt_length)
+            if executor is None:
+                return [hash_one(password) for password in passwords]
+            chunksize = max(1, len(passwords) // (self.workers * 4))
+            return list(executor.map(hash_one, passwords, chunksize=chunksize))
+        finally:
+            self._record('hash_batch', time.perf_counter() - started)
+
+    def verify(self, pwhash, password):
+        """Check a password, treating missing and placeholder hashes as invalid"""
+        if not pwhash or pwhash.startswith(PLACEHOLDER_HASH_PREFIX):
+            return False
+        return self._run('verify', _verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when a hash was not produced with the configured method"""
+        if not pwhash or pwhash.startswith(PLACEHOLDER_HASH_PREFIX):
+            return True
+        return pwhash.split('$', 1)[0] != self.method_prefix
+
+    @property
+    def method_prefix(self):
+        """Hash prefix the configured method produces, with every parameter spelled out.
+
+        Werkzeug fills in defaults ('scrypt' becomes 'scrypt:32768:8:1'), so
+        the prefix is taken from a real hash rather than from the config value.
+        """
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('', self.method, 1).split('$', 1)[0]
+        return self._method_prefix
+
+    def stats(self):
+        """Latency summary per operation: count, average and maximum in milliseconds"""
+        with self._lock:
+            return {
+                operation: {
+                    'count': stats['count'],
+                    'avg_ms': round(stats['total_seconds'] * 1000 / stats['count'], 2),
+                    'max_ms': round(stats['max_seconds'] * 1000, 2)
+                }
+                for operation, stats in self._stats.items()
+            }
+
+hasher = PasswordHasher()
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import update
+from models import db, EventType, EventStatus, RegistrationStatus
+
+# Immutable snapshots of lookup rows; safe to share between requests and threads
+EventTypeRow = namedtuple('EventTypeRow', ['event_type_id', 'type_name', 'type_description'])
+EventStatusRow = namedtuple('EventStatusRow', ['event_status_id', 'status_name', 'status_description'])
+RegistrationStatusRow = namedtuple('RegistrationStatusRow', ['registration_status_id', 'status_name', 'status_description', 'category'])
+
+# Registration status categories; cancelled and rejected registrations do not hold a spot
+REGISTRATION_CATEGORIES = ('pending', 'approved', 'rejected', 'cancelled', 'other')
+RELEASED_CATEGORIES = ('rejected', 'cancelled')
+
+def classify_registration_status(status_name):
+    """Derive a registration status category from its name"""
+    name = (status_name or '').lower()
+    if 'approved' in name or 'accept' in name or 'confirm' in name:
+        return 'approved'
+    if 'cancel' in name:
+        return 'cancelled'
+    if 'reject' in name or 'declined' in name:
+        return 'rejected'
+    if name == 'pending':
+        return 'pending'
+    return 'other'
+
+class ReferenceData:
+    """Process-level cache of the event type, event status and registration status tables.
+
+    The lookup tables are loaded once and served from memory until
+    invalidate() is called (or REFERENCE_DATA_TTL seconds pass, if set).
+    Every reload bumps `version`, which callers can use as a cache stamp.
+    """
+
+    def __init__(self, app=None):
+        self.version = 0
+        self.ttl = 0
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('REFERENCE_DATA_TTL', self.ttl)
+        app.extensions['reference_data'] = self
+
+        @app.context_processor
+        def inject_reference_data():
+            return {'reference_data': self}
+
+    def _load(self):
+        event_types = tuple(
+            EventTypeRow(t.event_type_id, t.type_name, t.type_description)
+            for t in EventType.query.order_by(EventType.event_type_id).all()
+        )
+        event_statuses = tuple(
+            EventStatusRow(s.event_status_id, s.status_name, s.status_description)
+            for s in EventStatus.query.order_by(EventStatus.event_status_id).all()
+        )
+        registration_status_models = RegistrationStatus.query.order_by(RegistrationStatus.registration_status_id).all()
+        self._persist_categories([s for s in registration_status_models if s.category is None])
+        registration_statuses = tuple(
+            RegistrationStatusRow(s.registration_status_id, s.status_name, s.status_description,
+                                  s.category or classify_registration_status(s.status_name))
+            for s in registration_status_models
+        )
+        
+        status_ids = {category: frozenset() for category in REGISTRATION_CATEGORIES}
+        for status in registration_statuses:
+            status_ids[status.category] = status_ids.get(status.category, frozenset()) | {status.registration_status_id}
+        
+        return {
+            'event_types': event_types,
+            'event_statuses': event_statuses,
+            'registration_statuses': registration_statuses,
+            'event_type_names': {t.event_type_id: t.type_name for t in event_types},
+            'event_status_names': {s.event_status_id: s.status_name for s in event_statuses},
+            'registration_status_names': {s.registration_status_id: s.status_name for s in registration_statuses},
+            'registration_status_categories': {s.registration_status_id: s.category for s in registration_statuses},
+            'registration_status_ids': status_ids
+        }
+
+    def _persist_categories(self, statuses):
+        """Store derived categories for statuses that do not have one yet"""
+        if not statuses:
+            return
+        # Use a separate transaction so the caller's pending changes are not committed
+        with db.engine.begin() as connection:
+            for status in statuses:
+                connection.execute(
+                    update(RegistrationStatus.__table__)
+                    .where(RegistrationStatus.__table__.c.registration_status_id == status.registration_status_id)
+                    .values(category=classify_registration_status(status.status_name))
+                )
+
+    def _get(self, key):
+        snapshot = self._snapshot
+        if snapshot is None or (self.ttl and time.monotonic() - self._loaded_at > self.ttl):
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or (self.ttl and time.monotonic() - self._loaded_at > self.ttl):
+                    snapshot = self._load()
+                    self._snapshot = snapshot
+                    self._loaded_at = time.monotonic()
+                    self.version += 1
+        return snapshot[key]
+
+    def invalidate(self):
+        """Drop the cached tables; the next read reloads them"""
+        with self._lock:
+            self._snapshot = None
+            self.version += 1
+
+    def event_types(self):
+        return self._get('event_types')
+
+    def event_statuses(self):
+        return self._get('event_statuses')
+
+    def registration_statuses(self):
+        return self._get('registration_statuses')
+
+    def event_type_names(self):
+        return self._get('event_type_names')
+
+    def event_status_names(self):
+        return self._get('event_status_names')
+
+    def registration_status_names(self):
+        return self._get('registration_status_names')
+
+    def registration_status_category(self, registration_status_id):
+        """Category of a registration status id, or None if the id is unknown"""
+        return self._get('registration_status_categories').get(registration_status_id)
+
+    def registration_status_ids(self, *categories):
+        """Set of registration status ids belonging to any of the given categories"""
+        status_ids = self._get('registration_status_ids')
+        return frozenset().union(*(status_ids.get(category, frozenset()) for category in categories))
+
+    def pending_status_id(self):
+        """Status for new registrations: 'Pending', else id 1, else the first status"""
+        pending = sorted(self.registration_status_ids('pending'))
+        if pending:
+            return pending[0]
+        status_ids = [s.registration_status_id for s in self.registration_statuses()]
+        if 1 in status_ids:
+            return 1
+        return status_ids[0] if status_ids else None
+
+    def cancelled_status_id(self):
+        """Status for participant cancellations: a cancelled status, else rejected, else the first status"""
+        for category in ('cancelled', 'rejected'):
+            status_ids = sorted(self.registration_status_ids(category))
+            if status_ids:
+                return status_ids[0]
+        statuses = self.registration_statuses()
+        return statuses[0].registration_status_id if statuses else None
+
+reference_data = ReferenceData()
@@ -0,0 +1,198 @@
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from cache import TTLCache
+from models import Event
+from pagination import KeysetPagination
+
+# Column snapshot of an event; templates read the same attributes as on the model
+EventSnapshot = namedtuple('EventSnapshot', [column.key for column in Event.__table__.columns])
+
+def snapshot_event(event_):
+    return EventSnapshot(*(getattr(event_, field) for field in EventSnapshot._fields))
+
+class CachedPage:
+    """Page-number pagination over cached items, mirroring Flask-SQLAlchemy's Pagination attributes"""
+
+    keyset = False
+
+    def __init__(self, items, page, per_page, total, next_cursor=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page)) if self.total and self.per_page else 0
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+def snapshot_pagination(pagination):
+    """Detach a Pagination or KeysetPagination from the session so it can be cached"""
+    items = [snapshot_event(item) for item in pagination.items]
+    if getattr(pagination, 'keyset', False):
+        return KeysetPagination(items, pagination.per_page, pagination.cursor, pagination.next_cursor, pagination.total)
+    return CachedPage(items, pagination.page, pagination.per_page, pagination.total, getattr(pagination, 'next_cursor', None))
+
+class MemoryBackend:
+    """Per-process LRU; invalidations only reach the process that made them (other processes rely on the TTL)"""
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+class SQLiteBackend:
+    """Cache in a local SQLite file shared by every worker process on the host"""
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_generation (namespace TEXT PRIMARY KEY, generation INTEGER)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self._connect() as connection:
+            now = time.time()
+            connection.execute('INSERT OR REPLACE INTO cache_entry (key, value, expires_at) VALUES (?, ?, ?)',
+                               (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + self.ttl))
+            # Keep the file small: drop a few expired entries on every write
+            connection.execute('DELETE FROM cache_entry WHERE key IN '
+                               '(SELECT key FROM cache_entry WHERE expires_at <= ? LIMIT 100)', (now,))
+
+    def generation(self, namespace):
+        row = self._connect().execute(
+            'SELECT generation FROM cache_generation WHERE namespace = ?', (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, namespace):
+        with self._connect() as connection:
+            connection.execute('INSERT INTO cache_generation (namespace, generation) VALUES (?, 1) '
+                               'ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1', (namespace,))
+
+class ListingCache:
+    """Cache of event listing pages keyed on (listing, role scope, page/cursor, search).
+
+    Keys embed a generation number for the 'events' namespace. Any ORM
+    insert, update or delete of an Event marks the session, and the
+    generation is bumped once that transaction commits, so every cached
+    listing is invalidated exactly when event data changes; entries also
+    expire after RESPONSE_CACHE_TTL seconds as a safety net. Backends:
+    'memory' (per-process LRU), 'sqlite' (file shared by local workers) or
+    'none'.
+    """
+
+    NAMESPACE = 'events'
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config.get('RESPONSE_CACHE_SIZE', 2048), ttl)
+        elif backend == 'sqlite':
+            path = app.config.get('RESPONSE_CACHE_PATH') or os.path.join(app.instance_path, 'response_cache.sqlite3')
+            self.backend = SQLiteBackend(path, ttl)
+        elif backend in (None, 'none'):
+            self.backend = None
+        else:
+            raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {backend}')
+        app.extensions['response_cache'] = self
+
+    def get_or_compute(self, listing, scope, params, compute):
+        """Return the cached page for these parameters, or compute, snapshot and store it"""
+        if self.backend is None:
+            return compute()
+        # Read the generation before querying so a concurrent change can only orphan this entry
+        generation = self.backend.generation(self.NAMESPACE)
+        key = repr((listing, scope, sorted(params.items()), generation))
+        page = self.backend.get(key)
+        if page is None:
+            page = snapshot_pagination(compute())
+            self.backend.set(key, page)
+        return page
+
+    def invalidate(self):
+        if self.backend is not None:
+            self.backend.bump(self.NAMESPACE)
+
+listing_cache = ListingCache()
+
+def mark_events_changed(session):
+    """Flag a session whose commit must invalidate cached listings (for Core writes to event)"""
+    session.info['events_changed'] = True
+
+@event.listens_for(Event, 'after_insert')
+@event.listens_for(Event, 'after_update')
+@event.listens_for(Event, 'after_delete')
+def _event_written(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_events_changed(session)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('events_changed', False):
+        listing_cache.invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('events_changed', None)
@@ -0,0 +1,246 @@
+import re
+import threading
+from sqlalchemy import select, text, table, column, func, literal_column, or_, and_, insert, delete, event, inspect
+from sqlalchemy.exc import OperationalError
+from models import db, Event, Participant, EventManager, SearchTrigram
+
+# People searchable through the trigram index: entity_type -> (model, primary key attribute)
+PERSON_MODELS = {
+    'participant': (Participant, 'participant_id'),
+    'event_manager': (EventManager, 'event_manager_id')
+}
+PERSON_SEARCH_FIELDS = ('email', 'first_name', 'last_name')
+
+# Engines (by URL) whose SQLite FTS5 index has been created and back-filled
+_fts_ready = set()
+_fts_lock = threading.Lock()
+# innodb_ft_min_token_size per MySQL engine URL
+_mysql_min_token_sizes = {}
+
+_SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS event_fts USING fts5(
+        event_name, event_description, location,
+        content='event', content_rowid='event_id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS event_fts_ai AFTER INSERT ON event BEGIN
+        INSERT INTO event_fts(rowid, event_name, event_description, location)
+        VALUES (new.event_id, new.event_name, new.event_description, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_fts_ad AFTER DELETE ON event BEGIN
+        INSERT INTO event_fts(event_fts, rowid, event_name, event_description, location)
+        VALUES ('delete', old.event_id, old.event_name, old.event_description, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_fts_au AFTER UPDATE OF event_name, event_description, location ON event BEGIN
+        INSERT INTO event_fts(event_fts, rowid, event_name, event_description, location)
+        VALUES ('delete', old.event_id, old.event_name, old.event_description, old.location);
+        INSERT INTO event_fts(rowid, event_name, event_description, location)
+        VALUES (new.event_id, new.event_name, new.event_description, new.location);
+    END"""
+]
+
+def search_terms(search_query):
+    """Split a search box value into lowercase word terms"""
+    return re.findall(r'\w+', (search_query or '').lower())
+
+def ensure_sqlite_event_index(rebuild=False):
+    """Create the SQLite FTS5 index and its sync triggers, back-filling existing events.
+
+    The index is rebuilt from the event table when it is new, when a sync
+    trigger is missing (the event table was dropped and recreated) or when
+    its row count differs from event's (rows loaded around the triggers),
+    and always with rebuild=True. Checked once per engine per process.
+    Returns False when FTS5 is not available in this SQLite build.
+    """
+    key = str(db.engine.url)
+    if key in _fts_ready and not rebuild:
+        return True
+    with _fts_lock:
+        if key in _fts_ready and not rebuild:
+            return True
+        try:
+            with db.engine.begin() as connection:
+                # Dropping the event table drops the triggers too, leaving the index describing old rows
+                triggers = connection.execute(
+                    text("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'event_fts_%'")
+                ).scalar()
+                rebuild = rebuild or triggers < len(_SQLITE_FTS_DDL) - 1
+                for statement in _SQLITE_FTS_DDL:
+                    connection.execute(text(statement))
+                if not rebuild:
+                    # A fresh table has no docsize rows, so it is caught by the count check as well
+                    indexed = connection.execute(text('SELECT COUNT(*) FROM event_fts_docsize')).scalar()
+                    rebuild = indexed != connection.execute(text('SELECT COUNT(*) FROM event')).scalar()
+                if rebuild:
+                    connection.execute(text("INSERT INTO event_fts(event_fts) VALUES ('rebuild')"))
+        except OperationalError:
+            return False
+        _fts_ready.add(key)
+        return True
+
+def rebuild_event_index():
+    """Rebuild the SQLite event full-text index; returns False when there is none to rebuild
+
+    MySQL maintains its FULLTEXT index itself, so this only acts on SQLite.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    return ensure_sqlite_event_index(rebuild=True)
+
+def _mysql_min_token_size():
+    """innodb_ft_min_token_size of the server (shorter words are not in the FULLTEXT index)"""
+    key = str(db.engine.url)
+    if key not in _mysql_min_token_sizes:
+        size = db.session.execute(text('SELECT @@innodb_ft_min_token_size')).scalar()
+        _mysql_min_token_sizes[key] = int(size or 3)
+    return _mysql_min_token_sizes[key]
+
+def _like_all(terms):
+    """Every term must appear in at least one searchable event column"""
+    return and_(*(
+        or_(*(func.lower(col).like(f'%{term}%') for col in (Event.event_name, Event.event_description, Event.location)))
+        for term in terms
+    ))
+
+def apply_event_search(query, search_query):
+    """Restrict an Event query to full-text matches of the search string.
+
+    Every term must match (as a word prefix) in the event name, description
+    or location. MySQL uses the ft_event_search FULLTEXT index and SQLite an
+    FTS5 table kept in sync by triggers; other databases fall back to LIKE.
+    Returns the filtered query and ORDER BY clauses ranking best matches first.
+    """
+    terms = search_terms(search_query)
+    if not terms:
+        return query, []
+
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import match
+        # Words shorter than the FULLTEXT token size ("up" in "Stand-Up") are not indexed and
+        # would never match as required terms, so they are checked with LIKE instead
+        min_size = _mysql_min_token_size()
+        indexed = [term for term in terms if len(term) >= min_size]
+        short = [term for term in terms if len(term) < min_size]
+        order = []
+        if indexed:
+            relevance = match(
+                Event.event_name, Event.event_description, Event.location,
+                against=' '.join(f'+{term}*' for term in indexed)
+            ).in_boolean_mode()
+            query = query.filter(relevance)
+            order = [relevance.desc()]
+        if short:
+            query = query.filter(_like_all(short))
+        return query, order
+
+    if dialect == 'sqlite' and ensure_sqlite_event_index():
+        fts = table('event_fts', column('rowid'), column('event_fts'))
+        hits = (
+            select(fts.c.rowid.label('event_id'), func.bm25(literal_column('event_fts')).label('rank'))
+            .where(fts.c.event_fts.op('MATCH')(' '.join(f'"{term}"*' for term in terms)))
+            .subquery()
+        )
+        return query.join(hits, hits.c.event_id == Event.event_id), [hits.c.rank.asc()]
+
+    # Fallback: every term must appear in at least one searchable column
+    return query.filter(_like_all(terms)), []
+
+def trigrams(value):
+    """Set of 3-character substrings of a lowercased value"""
+    value = (value or '').lower()
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+def person_trigrams(person):
+    """Trigrams of a person's email, first and last name (each field separately)"""
+    grams = set()
+    for field in PERSON_SEARCH_FIELDS:
+        grams |= trigrams(getattr(person, field))
+    return grams
+
+def index_people(connection, entity_type, people, replace=True):
+    """Write trigram rows for (entity_id, person) pairs; person exposes email/first_name/last_name"""
+    people = list(people)
+    if not people:
+        return
+    table_ = SearchTrigram.__table__
+    if replace:
+        connection.execute(
+            delete(table_).where(
+                table_.c.entity_type == entity_type,
+                table_.c.entity_id.in_([entity_id for entity_id, _ in people])
+            )
+        )
+    rows = [
+        {'entity_type': entity_type, 'entity_id': entity_id, 'trigram': gram}
+        for entity_id, person in people
+        for gram in person_trigrams(person)
+    ]
+    if rows:
+        connection.execute(insert(table_), rows)
+
+def rebuild_person_index(batch_size=1000):
+    """Re-index every participant and event manager; returns the number of people indexed"""
+    indexed = 0
+    for entity_type, (model, pk_name) in PERSON_MODELS.items():
+        pk = getattr(model, pk_name)
+        db.session.execute(delete(SearchTrigram).where(SearchTrigram.entity_type == entity_type))
+        last_id = 0
+        while True:
+            batch = db.session.execute(
+                select(pk, model.email, model.first_name, model.last_name)
+                .where(pk > last_id).order_by(pk).limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            index_people(db.session.connection(), entity_type, [(row[0], row) for row in batch], replace=False)
+            last_id = batch[-1][0]
+            indexed += len(batch)
+        db.session.commit()
+    return indexed
+
+def apply_person_search(query, entity_type, search_query):
+    """Restrict a Participant or EventManager query to people matching every search word.
+
+    Each word must appear as a substring of the email, first name or last
+    name. Words of three or more characters are first narrowed through the
+    search_trigram index, so the substring check only runs on candidates.
+    """
+    model, pk_name = PERSON_MODELS[entity_type]
+    pk = getattr(model, pk_name)
+    fields = [getattr(model, field) for field in PERSON_SEARCH_FIELDS]
+
+    for word in (search_query or '').lower().split():
+        grams = trigrams(word)
+        if grams:
+            candidates = (
+                select(SearchTrigram.entity_id)
+                .where(SearchTrigram.entity_type == entity_type, SearchTrigram.trigram.in_(grams))
+                .group_by(SearchTrigram.entity_id)
+                .having(func.count() == len(grams))
+            )
+            query = query.filter(pk.in_(candidates))
+        query = query.filter(or_(*(func.lower(field).like(f'%{word}%') for field in fields)))
+    return query
+
+def _register_person_index_listeners(entity_type, model, pk_name):
+    """Keep trigram rows in step with ORM inserts, edits and deletes of a person model"""
+
+    @event.listens_for(model, 'after_insert')
+    def index_after_insert(mapper, connection, target):
+        index_people(connection, entity_type, [(getattr(target, pk_name), target)], replace=False)
+
+    @event.listens_for(model, 'after_update')
+    def index_after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in PERSON_SEARCH_FIELDS):
+            index_people(connection, entity_type, [(getattr(target, pk_name), target)])
+
+    @event.listens_for(model, 'after_delete')
+    def index_after_delete(mapper, connection, target):
+        table_ = SearchTrigram.__table__
+        connection.execute(
+            delete(table_).where(table_.c.entity_type == entity_type, table_.c.entity_id == getattr(target, pk_name))
+        )
+
+for _entity_type, (_model, _pk_name) in PERSON_MODELS.items():
+    _register_person_index_listeners(_entity_type, _model, _pk_name)
@@ -0,0 +1,200 @@
+from datetime import datetime
+from sqlalchemy import update, select, func, case, or_
+from models import db, Event, Registration
+from reference_data import reference_data, RELEASED_CATEGORIES
+
+def counter_deltas(old_status_id, new_status_id):
+    """Change in (active, approved) counts when a registration moves between statuses.
+
+    old_status_id is None for a new registration and new_status_id is None
+    for a removed one.
+    """
+    def weights(status_id):
+        if status_id is None:
+            return 0, 0
+        category = reference_data.registration_status_category(status_id)
+        active = 0 if category in RELEASED_CATEGORIES else 1
+        approved = 1 if category == 'approved' else 0
+        return active, approved
+
+    old_active, old_approved = weights(old_status_id)
+    new_active, new_approved = weights(new_status_id)
+    return new_active - old_active, new_approved - old_approved
+
+def adjust_event_counters(event_id, active_delta, approved_delta, limit=None):
+    """Apply counter deltas to an event in the current transaction.
+
+    The increment happens in a single conditional UPDATE, so concurrent
+    writers cannot lose updates. With limit='active' or limit='approved' the
+    UPDATE only matches while that counter stays within total_spots; the row
+    lock it takes is held until commit, so racing reservations serialize on
+    the one event row and can never oversell. Returns False when the event
+    was full and nothing was changed.
+    """
+    if not active_delta and not approved_delta:
+        return True
+    conditions = [Event.event_id == event_id]
+    capacity_unlimited = or_(Event.total_spots.is_(None), Event.total_spots == 0)
+    if limit == 'active' and active_delta > 0:
+        conditions.append(or_(capacity_unlimited, Event.active_registration_count + active_delta <= Event.total_spots))
+    elif limit == 'approved' and approved_delta > 0:
+        conditions.append(or_(capacity_unlimited, Event.approved_count + approved_delta <= Event.total_spots))
+    result = db.session.execute(
+        update(Event)
+        .where(*conditions)
+        .values(
+            active_registration_count=Event.active_registration_count + active_delta,
+            approved_count=Event.approved_count + approved_delta,
+            # Counter maintenance is not an edit of the event itself
+            updated_at=Event.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def create_registration(event_id, participant_id, registration_status_id, additional_info=None):
+    """Reserve a spot and add a registration in the current transaction.
+
+    Returns the new Registration, or None when the event is already full.
+    The caller commits (or rolls back on error).
+    """
+    active_delta, approved_delta = counter_deltas(None, registration_status_id)
+    if not adjust_event_counters(event_id, active_delta, approved_delta, limit='active'):
+        return None
+    registration = Registration(
+        event_id=event_id,
+        participant_id=participant_id,
+        registration_status_id=registration_status_id,
+        additional_info=additional_info
+    )
+    db.session.add(registration)
+    return registration
+
+def record_status_change(registration, new_status_id, limit=None):
+    """Move a registration to a new status and keep its event's counters in step.
+
+    Returns False (and leaves the registration unchanged) when `limit` would
+    be exceeded, e.g. limit='approved' when approving into a full event.
+    """
+    active_delta, approved_delta = counter_deltas(registration.registration_status_id, new_status_id)
+    if not adjust_event_counters(registration.event_id, active_delta, approved_delta, limit=limit):
+        return False
+    registration.registration_status_id = new_status_id
+    return True
+
+def apply_status_changes(event_id, changes, updated_by_event_manager_id=None):
+    """Apply many (registration_id, new_status_id) changes for one event in the current transaction.
+
+    The event row is locked once and capacity is checked once for the whole
+    batch: changes that free approved spots are applied first, then
+    approvals are admitted in request order while spots remain. Accepted
+    changes are written with one UPDATE per target status and the counters
+    with a single adjustment. Returns one result dict per requested change,
+    in order, with `result` set to 'updated', 'unchanged' or 'failed'.
+    The caller commits.
+    """
+    event = db.session.execute(
+        select(Event.approved_count, Event.total_spots).where(Event.event_id == event_id).with_for_update()
+    ).one()
+    current = dict(db.session.execute(
+        select(Registration.registration_id, Registration.registration_status_id)
+        .where(Registration.event_id == event_id, Registration.registration_id.in_({rid for rid, _ in changes}))
+    ).all())
+
+    results = []
+    seen = set()
+    releases, approvals = [], []
+    for registration_id, new_status_id in changes:
+        result = {'registration_id': registration_id, 'registration_status_id': new_status_id}
+        results.append(result)
+        old_status_id = current.get(registration_id)
+        if registration_id in seen:
+            result.update(result='failed', error='Registration listed more than once')
+        elif old_status_id is None:
+            result.update(result='failed', error='Registration not found for this event')
+        elif reference_data.registration_status_category(new_status_id) is None:
+            result.update(result='failed', error='Invalid registration status')
+        elif old_status_id == new_status_id:
+            result['result'] = 'unchanged'
+        else:
+            deltas = counter_deltas(old_status_id, new_status_id)
+            (approvals if deltas[1] > 0 else releases).append((result, deltas))
+        seen.add(registration_id)
+
+    active_total = approved_total = 0
+    accepted = []
+    for result, (active_delta, approved_delta) in releases:
+        active_total += active_delta
+        approved_total += approved_delta
+        accepted.append(result)
+    spots = event.total_spots or None
+    for result, (active_delta, approved_delta) in approvals:
+        if spots is not None and event.approved_count + approved_total + approved_delta > spots:
+            result.update(result='failed', error=f'Event is full ({spots} spots available)')
+            continue
+        active_total += active_delta
+        approved_total += approved_delta
+        accepted.append(result)
+
+    if accepted:
+        if not adjust_event_counters(event_id, active_total, approved_total, limit='approved'):
+            raise RuntimeError(f'Seat counters for event {event_id} changed while locked')
+        by_status = {}
+        for result in accepted:
+            by_status.setdefault(result['registration_status_id'], []).append(result['registration_id'])
+        now = datetime.utcnow()
+        for status_id, registration_ids in by_status.items():
+            db.session.execute(
+                update(Registration)
+                .where(Registration.registration_id.in_(registration_ids))
+                .values(registration_status_id=status_id, status_updated_at=now,
+                        updated_by_event_manager_id=updated_by_event_manager_id)
+                .execution_options(synchronize_session=False)
+            )
+        for result in accepted:
+            result['result'] = 'updated'
+    return results
+
+def reconcile_seat_counters(event_ids=None):
+    """Recount registrations and repair events whose counters have drifted.
+
+    Returns a list of (event_id, old_counts, new_counts) for every repaired event.
+    """
+    active_ids = list(reference_data.registration_status_ids('pending', 'approved', 'other'))
+    approved_ids = list(reference_data.registration_status_ids('approved'))
+
+    actual = (
+        select(
+            Registration.event_id,
+            func.sum(case((Registration.registration_status_id.in_(active_ids), 1), else_=0)).label('active'),
+            func.sum(case((Registration.registration_status_id.in_(approved_ids), 1), else_=0)).label('approved')
+        )
+        .group_by(Registration.event_id)
+        .subquery()
+    )
+    query = (
+        select(
+            Event.event_id,
+            Event.active_registration_count,
+            Event.approved_count,
+            func.coalesce(actual.c.active, 0),
+            func.coalesce(actual.c.approved, 0)
+        )
+        .outerjoin(actual, actual.c.event_id == Event.event_id)
+    )
+    if event_ids is not None:
+        query = query.where(Event.event_id.in_(event_ids))
+
+    repaired = []
+    for event_id, old_active, old_approved, new_active, new_approved in db.session.execute(query).all():
+        if (old_active, old_approved) == (new_active, new_approved):
+            continue
+        db.session.execute(
+            update(Event)
+            .where(Event.event_id == event_id)
+            .values(active_registration_count=new_active, approved_count=new_approved, updated_at=Event.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        repaired.append((event_id, (old_active, old_approved), (new_active, new_approved)))
+    db.session.commit()
+    return repaired
@@ -0,0 +1,122 @@
+import calendar
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from models import db, Event
+from dashboard_stats import count_bulk_events
+from response_cache import mark_events_changed
+
+RECURRENCE_FREQUENCIES = ('weekly', 'monthly')
+# Upper bound on occurrences generated by one series (two years of weekly shows)
+MAX_SERIES_OCCURRENCES = 104
+
+class SeriesError(ValueError):
+    """A recurrence rule that cannot be expanded, or a series that collides with existing events"""
+
+def _positive_int(value, label):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise SeriesError(f'{label} must be a positive whole number')
+    return number
+
+def parse_repeat_form(form):
+    """Read the add event form's repeat fields as (frequency, interval, until, count).
+
+    Returns None when the event does not repeat; malformed values raise a
+    SeriesError naming the field.
+    """
+    frequency = form.get('repeat_frequency', 'none').strip()
+    if not frequency or frequency == 'none':
+        return None
+    interval_str = form.get('repeat_interval', '').strip()
+    until_str = form.get('repeat_until', '').strip()
+    count_str = form.get('repeat_count', '').strip()
+    interval = _positive_int(interval_str, 'Repeat interval') if interval_str else 1
+    count = _positive_int(count_str, 'Number of events') if count_str else None
+    until = None
+    if until_str:
+        try:
+            until = datetime.strptime(until_str, '%Y-%m-%d')
+        except ValueError:
+            raise SeriesError('Repeat until must be a date (YYYY-MM-DD)') from None
+    return frequency, interval, until, count
+
+def _add_months(value, months):
+    """Same day and time `months` later, clamped to the end of shorter months"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+def expand_recurrence(start, frequency, interval=1, until=None, count=None):
+    """List of occurrence datetimes for a weekly or monthly rule, starting with `start`.
+
+    The series ends at `until` (inclusive, compared by date) or after
+    `count` occurrences, whichever comes first; at least one is required.
+    """
+    if frequency not in RECURRENCE_FREQUENCIES:
+        raise SeriesError(f'Unsupported repeat frequency: {frequency}')
+    if until is None and not count:
+        raise SeriesError('A repeating event needs an end date or a number of occurrences')
+    if interval < 1:
+        raise SeriesError('Repeat interval must be at least 1')
+    if count and count > MAX_SERIES_OCCURRENCES:
+        raise SeriesError(f'A series can have at most {MAX_SERIES_OCCURRENCES} occurrences')
+
+    occurrences = []
+    while True:
+        if frequency == 'weekly':
+            occurrence = start + timedelta(weeks=interval * len(occurrences))
+        else:
+            occurrence = _add_months(start, interval * len(occurrences))
+        if until is not None and occurrence.date() > until.date():
+            break
+        occurrences.append(occurrence)
+        if count and len(occurrences) >= count:
+            break
+        if len(occurrences) > MAX_SERIES_OCCURRENCES:
+            raise SeriesError(f'A series can have at most {MAX_SERIES_OCCURRENCES} occurrences')
+    return occurrences
+
+def create_event_series(template, occurrences):
+    """Insert one event per occurrence date in the current transaction.
+
+    `template` holds the Event column values shared by every occurrence
+    (event_date excluded); a registration_deadline is shifted along with
+    each occurrence. Collisions with existing events of the same name
+    (uq_event_name_date) are found with one query up front and reported as
+    a SeriesError instead of failing half way. All occurrences are inserted
+    with one multi-row INSERT. Returns the number of events created; the
+    caller commits.
+    """
+    if not occurrences:
+        raise SeriesError('The repeat rule produced no dates')
+    collisions = db.session.execute(
+        select(Event.event_date)
+        .where(Event.event_name == template['event_name'], Event.event_date.in_(occurrences))
+        .order_by(Event.event_date)
+    ).scalars().all()
+    if collisions:
+        dates = ', '.join(collision.strftime('%Y-%m-%d %H:%M') for collision in collisions[:5])
+        more = f' and {len(collisions) - 5} more' if len(collisions) > 5 else ''
+        raise SeriesError(f"'{template['event_name']}' already exists on {dates}{more}")
+
+    first = occurrences[0]
+    deadline = template.get('registration_deadline')
+    deadline_offset = deadline - first if deadline is not None else None
+    rows = [
+        {
+            **template,
+            'event_date': occurrence,
+            'registration_deadline': occurrence + deadline_offset if deadline_offset is not None else None
+        }
+        for occurrence in occurrences
+    ]
+    connection = db.session.connection()
+    connection.execute(insert(Event), rows)
+    # Core inserts skip the ORM listeners, so keep the dashboard counters in step here
+    count_bulk_events(connection, occurrences)
+    mark_events_changed(db.session())
+    return len(rows)
@@ -0,0 +1,111 @@
+import os
+import time
+from jinja2 import nodes, FileSystemBytecodeCache
+from jinja2.ext import Extension
+from cache import TTLCache
+
+class FragmentCacheExtension(Extension):
+    """`{% cache 'name', part, ... %}...{% endcache %}` caches the rendered block.
+
+    The key is the tuple of the tag's arguments, so it must name everything
+    the block's output depends on, e.g. `'event-card', event.event_id,
+    event.updated_at`; a changed row gets a new key and the old entry simply
+    ages out of the LRU. Keep per-user content (session, registrations)
+    outside the block.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.Tuple(parts, 'load')]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = caller()
+            cache.set(key, rendered)
+        return rendered
+
+class FragmentCache:
+    """Bounded LRU of rendered template fragments behind the `{% cache %}` tag.
+
+    FRAGMENT_CACHE_SIZE sets the number of fragments kept (0 renders every
+    block on each request).
+    """
+
+    def __init__(self, app=None):
+        self.cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        size = app.config.get('FRAGMENT_CACHE_SIZE', 4096)
+        # Entries are keyed on their inputs, so they never go stale and need no TTL
+        self.cache = TTLCache(maxsize=size, ttl=0) if size else None
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self.cache
+        app.extensions['fragment_cache'] = self
+
+    def clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+fragment_cache = FragmentCache()
+
+class TemplateCompilation:
+    """Persistent Jinja bytecode cache and optional template warm-up.
+
+    Compiled templates are written to JINJA_BYTECODE_CACHE_DIR (default
+    instance/jinja_bytecode, '' disables), so a fresh worker loads bytecode
+    instead of compiling; entries are keyed on the template source, so an
+    edited template is recompiled. With TEMPLATE_WARMUP set every template
+    is loaded at startup rather than on the first request that renders it.
+    """
+
+    def __init__(self, app=None):
+        self.bytecode_cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+        if directory is None:
+            directory = os.path.join(app.instance_path, 'jinja_bytecode')
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.bytecode_cache = FileSystemBytecodeCache(directory)
+            app.jinja_env.bytecode_cache = self.bytecode_cache
+        app.extensions['template_compilation'] = self
+        if app.config.get('TEMPLATE_WARMUP'):
+            timings = self.warm(app)
+            app.logger.info('Warmed %d template(s) in %.1f ms', len(timings),
+                            sum(seconds for _, seconds in timings) * 1000)
+
+    def warm(self, app):
+        """Load every template into the environment; returns (name, seconds) pairs, slowest first"""
+        timings = []
+        for name in app.jinja_env.list_templates(extensions=['html']):
+            started = time.perf_counter()
+            app.jinja_env.get_template(name)
+            timings.append((name, time.perf_counter() - started))
+        return sorted(timings, key=lambda timing: timing[1], reverse=True)
+
+    def clear(self):
+        if self.bytecode_cache is not None:
+            self.bytecode_cache.clear()
+
+template_compilation = TemplateCompilation()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test that a login upgrades an outdated password hash exactly once.
+
+The hash method is configured without its parameters ('pbkdf2:sha256'),
+which Werkzeug expands when hashing; a second login must not rewrite the
+hash again. Runs against a throwaway SQLite database.
+"""
+
+import os
+import tempfile
+from flask import Flask
+from werkzeug.security import generate_password_hash
+from models import db, Participant
+from passwords import hasher
+from auth import authenticate_user
+
+PASSWORD = 'comedy123'
+
+def create_test_app(database_url):
+    """Build a minimal app bound to the test database"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    test_app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256'
+    db.init_app(test_app)
+    hasher.init_app(test_app)
+    return test_app
+
+def test_second_login_keeps_upgraded_hash():
+    """Log in twice: the first login rehashes, the second leaves the hash alone"""
+    tmp_dir = tempfile.TemporaryDirectory()
+    test_app = create_test_app(f"sqlite:///{os.path.join(tmp_dir.name, 'rehash.db')}")
+
+    with test_app.app_context():
+        db.create_all()
+        old_hash = generate_password_hash(PASSWORD, 'pbkdf2:sha256:1000')
+        db.session.add(Participant(email='rehash@example.com', password_hash=old_hash, first_name='Re', last_name='Hash'))
+        db.session.commit()
+
+        user, user_type = authenticate_user('rehash@example.com', PASSWORD)
+        assert user_type == 'participant'
+        upgraded = db.session.get(Participant, user.participant_id).password_hash
+        assert upgraded != old_hash
+        assert upgraded.startswith(hasher.method_prefix + '$')
+
+        user, user_type = authenticate_user('rehash@example.com', PASSWORD)
+        assert user_type == 'participant'
+        assert db.session.get(Participant, user.participant_id).password_hash == upgraded
+        db.session.remove()
+        db.engine.dispose()
+
+    tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    print("=== Password Rehash Test ===")
+    try:
+        test_second_login_keeps_upgraded_hash()
+        print("✅ Second login does not rewrite the hash")
+    except AssertionError as e:
+        print(f"❌ Password rehash test failed: {e}")
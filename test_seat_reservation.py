@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for seat reservation.
+
+Many threads register participants for one event at the same time and the
+test asserts that exactly total_spots registrations succeed. Runs against a
+throwaway SQLite database, or against TEST_DATABASE_URL if set (use a
+scratch MySQL schema, never production).
+"""
+
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from flask import Flask
+from models import db, Admin, EventManager, Participant, Event, EventType, EventStatus, Registration, RegistrationStatus
+from seats import create_registration
+from reference_data import reference_data
+
+TOTAL_SPOTS = 25
+THREADS = 20
+ATTEMPTS_PER_THREAD = 10
+
+def create_test_app(database_url):
+    """Build a minimal app bound to the test database"""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if database_url.startswith('sqlite'):
+        # Let writers wait for the database lock instead of failing immediately
+        test_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(test_app)
+    return test_app
+
+def seed(participant_count):
+    """Create reference data, one limited-capacity event and the participants"""
+    db.drop_all()
+    db.create_all()
+    db.session.add(EventType(type_name='Stand-Up Comedy - Open Mic'))
+    db.session.add(EventStatus(status_name='Registration Open'))
+    for name in ['Pending', 'Confirmed', 'Rejected', 'Cancelled']:
+        db.session.add(RegistrationStatus(status_name=name))
+    admin = Admin(role='super_admin', email='load.admin@example.com', password_hash='x', first_name='Load', last_name='Admin')
+    db.session.add(admin)
+    db.session.flush()
+    manager = EventManager(created_by_admin_id=admin.admin_id, role='Event Manager', email='load.manager@example.com',
+                           password_hash='x', first_name='Load', last_name='Manager')
+    db.session.add(manager)
+    db.session.flush()
+    event = Event(event_manager_id=manager.event_manager_id, event_type_id=1, event_status_id=1,
+                  event_name='Load Test Comedy Night', event_date=datetime.utcnow() + timedelta(days=7),
+                  total_spots=TOTAL_SPOTS)
+    db.session.add(event)
+    participants = [
+        Participant(email=f'fan{i}@example.com', password_hash='x', first_name='Fan', last_name=str(i))
+        for i in range(participant_count)
+    ]
+    db.session.add_all(participants)
+    db.session.commit()
+    reference_data.invalidate()
+    return event.event_id, [p.participant_id for p in participants]
+
+def test_concurrent_reservations_never_oversell():
+    """Hammer one event from many threads and check the exact seat count"""
+    database_url = os.environ.get('TEST_DATABASE_URL')
+    tmp_dir = None
+    if not database_url:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'seats.db')}"
+    test_app = create_test_app(database_url)
+
+    with test_app.app_context():
+        event_id, participant_ids = seed(THREADS * ATTEMPTS_PER_THREAD)
+        pending_status_id = reference_data.pending_status_id()
+
+    results = {'reserved': 0, 'full': 0, 'errors': []}
+    results_lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def worker(chunk):
+        start.wait()
+        for participant_id in chunk:
+            with test_app.app_context():
+                try:
+                    registration = create_registration(event_id, participant_id, pending_status_id)
+                    if registration is None:
+                        db.session.rollback()
+                        outcome = 'full'
+                    else:
+                        db.session.commit()
+                        outcome = 'reserved'
+                    with results_lock:
+                        results[outcome] += 1
+                except Exception as e:
+                    db.session.rollback()
+                    with results_lock:
+                        results['errors'].append(str(e))
+
+    chunks = [participant_ids[i::THREADS] for i in range(THREADS)]
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with test_app.app_context():
+        event = db.session.get(Event, event_id)
+        stored = Registration.query.filter_by(event_id=event_id).count()
+        print(f"Reserved: {results['reserved']}, turned away: {results['full']}, errors: {len(results['errors'])}")
+        print(f"Stored registrations: {stored}, counter: {event.active_registration_count}, spots: {event.total_spots}")
+        assert not results['errors'], results['errors'][:3]
+        assert results['reserved'] == TOTAL_SPOTS
+        assert stored == TOTAL_SPOTS
+        assert event.active_registration_count == TOTAL_SPOTS
+        db.session.remove()
+        if tmp_dir is not None:
+            db.engine.dispose()
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    print("=== Concurrent Seat Reservation Test ===")
+    try:
+        test_concurrent_reservations_never_oversell()
+        print("✅ No oversell under concurrent load")
+    except AssertionError as e:
+        print(f"❌ Seat reservation test failed: {e}")